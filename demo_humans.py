@@ -30,7 +30,11 @@ class Status(enum.Enum):
 	active = auto()
 	inactive = auto()
 
-	
+
+@funcli.constraint(
+	lambda lang, score, status: len(lang) == len(score) == len(status),
+	"You're expected to provide complete informations for all lists",
+)
 def hello(
 	name: str,
 	age: int,
@@ -50,9 +54,6 @@ def hello(
 	:return:
 	"""
 	
-	if not (len(lang) == len(score) == len(status)):
-		raise funcli.ArgError(arg_name="lang, score, status", message="You're expected to provide complete informations for all lists")
-	
 	print(f"Hello {name}")
 	print(f"So you're {age}?")
 	if enjoy_funcli:
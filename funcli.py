@@ -1,14 +1,43 @@
-
-
+import abc
 import argparse
+import ast
+import atexit
+import contextlib
+import contextvars
+import copy
 import enum
+import gc
+import hashlib
+import importlib
+import importlib.util
 import inspect
+import io
+import json
 import logging
+import math
+import mmap
 import os
+import pathlib
+import pickle
+import re
+import shlex
+import shutil
+import signal
 import sys
+import textwrap
+import threading
+import time
+import tokenize
+import types
 import typing
+import dataclasses
 from dataclasses import dataclass
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 log = logging.getLogger(__name__)
 
 class CustomAppendAction(argparse.Action):
@@ -22,22 +51,119 @@ class CustomAppendAction(argparse.Action):
     value when the argument is specified for the first time.
     """
 
-    def __init__(self, option_strings, dest, nargs=None, **kwargs):
-        """Initialize the action."""
-        self.called_times = 0
-        self.default_value = kwargs.get("default")
-        super().__init__(option_strings, dest, **kwargs)
-
     def __call__(self, parser, namespace, values, option_string=None):
         """When the argument is specified on the commandline."""
         current_values = getattr(namespace, self.dest)
 
-        if self.called_times == 0 and current_values == self.default_value:
+        # The namespace holds the default itself until the argument is specified for the first time.
+        # No state is kept on the action, so the parser can be used for many parses.
+        if current_values is self.default:
             current_values = []
 
         current_values.append(values)
         setattr(namespace, self.dest, current_values)
-        self.called_times += 1
+
+# Annotations of the args receiving the content of a file given by its path
+# - memoryview: a read-only memory mapping of the file, pages are loaded on access and shared between processes
+# - typing.BinaryIO: the file opened as a buffered binary reader
+FILE_TYPES = (memoryview, typing.BinaryIO)
+
+
+def existing_file(value: str) -> pathlib.Path:
+    """
+    Check, while parsing args, that a path points to a readable file.
+    :param value: A path given on the command line
+    :return: The path
+    """
+    path = pathlib.Path(value)
+    if not path.is_file():
+        raise argparse.ArgumentTypeError(f"no such file: '{value}'")
+    if not os.access(path, os.R_OK):
+        raise argparse.ArgumentTypeError(f"permission denied: '{value}'")
+    return path
+
+
+def open_file(a_type, path: pathlib.Path, stack: contextlib.ExitStack):
+    """
+    Open a file the way the arg annotation asks for.
+    :param a_type: One of FILE_TYPES
+    :param path: The path of the file
+    :param stack: Closes the file when the call is over
+    :return: A read-only memoryview or a buffered reader
+    """
+    file = stack.enter_context(open(path, "rb"))
+    if a_type is memoryview:
+        if os.fstat(file.fileno()).st_size == 0:  # Empty files can't be mapped
+            return memoryview(b"")
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapping)
+
+        def close_mapping():
+            view.release()
+            try:
+                mapping.close()
+            except BufferError:  # The function kept a slice of the view, let the gc close it
+                pass
+        stack.callback(close_mapping)
+        return view
+    return file
+
+
+TRUE_STRINGS = ("1", "true", "yes", "on")
+FALSE_STRINGS = ("0", "false", "no", "off")
+
+
+def to_bool(value: str) -> bool:
+    """
+    Convert a bool read as str, eg: from a table or the environment.
+    :param value: One of TRUE_STRINGS or FALSE_STRINGS, case insensitive
+    :return: The bool
+    """
+    if value.lower() in TRUE_STRINGS:
+        return True
+    if value.lower() in FALSE_STRINGS:
+        return False
+    raise ValueError(f"invalid bool value: '{value}'")
+
+
+ARROW_SUFFIXES = (".parquet", ".arrow", ".feather")
+
+
+def read_table(path: str) -> dict:
+    """
+    Read a table column by column.
+    CSV files need a header line, their cells are read as str.
+    Parquet and Arrow files keep their types, they need pyarrow.
+    :param path: The table path, its format is found from its suffix
+    :return: The columns by name, as lists of the same length
+    """
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix in ARROW_SUFFIXES:
+        try:
+            if suffix == ".parquet":
+                import pyarrow.parquet
+                table = pyarrow.parquet.read_table(path)
+            else:
+                import pyarrow.feather
+                table = pyarrow.feather.read_table(path)
+        except ImportError:
+            raise ArgumentParseError(f"pyarrow is required to read {suffix} tables")
+        return {name: table.column(name).to_pylist() for name in table.column_names}
+
+    import csv  # Only imported when a table is read
+    with open(path, newline="") as file:
+        reader = csv.reader(file)
+        try:
+            header = next(reader, [])
+            rows = list(reader)
+        except csv.Error as e:
+            raise ArgumentParseError(f"{path}: {e}") from None
+    for index, row in enumerate(rows):
+        if len(row) != len(header):
+            raise ArgumentParseError(f"row {index + 1} of {path} has {len(row)} cells, {len(header)} expected")
+    columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in header]
+    return dict(zip(header, columns))
+
 
 class ArgError(ValueError):
     def __init__(self, arg_name: str, message: str, *args: object) -> None:
@@ -46,23 +172,251 @@ class ArgError(ValueError):
         super().__init__(f"{arg_name}: {message}", *args)
 
 
-@dataclass
+class ArgumentParseError(ValueError):
+    """An argv that can't be parsed, raised instead of exiting when parse errors are raised."""
+
+
+raise_parse_errors = contextvars.ContextVar("raise_parse_errors", default=False)
+help_format = contextvars.ContextVar("help_format", default="text")  # "text" or "json", set by --help-format
+HELP_FORMATS = ["text", "json"]
+# Set while SchemaCli imports a script, so the Cli.run of the script itself doesn't run a second call
+importing_script = contextvars.ContextVar("importing_script", default=False)
+
+
+@contextlib.contextmanager
+def set_context(variable: contextvars.ContextVar, value):
+    """Set a context variable while in the with block."""
+    token = variable.set(value)
+    try:
+        yield
+    finally:
+        variable.reset(token)
+
+
+class ArgumentParser(argparse.ArgumentParser):
+    """
+    An ArgumentParser that raises ArgumentParseError instead of printing the usage and exiting,
+    when raise_parse_errors is set. The flag is a context variable, so it only applies to the
+    thread setting it: a served CLI can parse requests while the same parser parses argv.
+
+    Its help is rendered in the help_format of the context, funcli args as a HelpTable,
+    and cached: it's only rendered once per format and terminal width.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.help_cache = {}
+
+    def error(self, message):
+        if raise_parse_errors.get():
+            raise ArgumentParseError(message)
+        super().error(message)
+
+    def format_help(self):
+        key = (help_format.get(), shutil.get_terminal_size().columns)
+        help_text = self.help_cache.get(key)
+        if help_text is None:
+            if key[0] == "json":
+                help_text = json.dumps(self.to_help_json(), indent=4) + os.linesep
+            else:
+                help_text = self.format_help_text()
+            help_text = self.help_cache.setdefault(key, help_text)  # Threads rendering it together keep the first
+        return help_text
+
+    def format_help_text(self) -> str:
+        # Like argparse, except for the groups of funcli args, rendered as a table
+        formatter = self._get_formatter()
+        formatter.add_usage(self.usage, self._actions, self._mutually_exclusive_groups)
+        formatter.add_text(self.description)
+        for action_group in self._action_groups:
+            formatter.start_section(action_group.title)
+            formatter.add_text(action_group.description)
+            if hasattr(action_group, "funcli_table") and action_group._group_actions:
+                table = action_group.funcli_table
+                if table is None:
+                    table = HelpTable(
+                        [(formatter._format_action_invocation(action), get_help_row(action))
+                         for action in action_group._group_actions]
+                    )
+                    action_group.funcli_table = table
+                formatter.add_text(table.render(formatter._width - formatter._current_indent))
+            else:
+                formatter.add_arguments(action_group._group_actions)
+            formatter.end_section()
+        formatter.add_text(self.epilog)
+        return formatter.format_help()
+
+    def to_help_json(self) -> dict:
+        """
+        Describe the help with JSON serializable data, for tools.
+        :return: The prog, usage, description, options, funcli args and subcommands
+        """
+        options = []
+        args = []
+        subcommands = {}
+        for action in self._actions:
+            row = get_help_row(action)
+            if row is not None:
+                args.append({
+                    "name": action.dest,
+                    "options": action.option_strings,
+                    "required": row.required,
+                    "multiple": row.multiple,
+                    "type": row.type_name,
+                    "default": None if isinstance(action.default, Lazy) else to_json(action.default),
+                    "default_text": row.default,
+                    "choices": action.choices,
+                    "description": row.description,
+                })
+            elif isinstance(action, argparse._SubParsersAction):
+                subcommands = {choice.dest: choice.help for choice in action._choices_actions}
+            elif action.help != argparse.SUPPRESS:
+                options.append({"options": action.option_strings, "help": action.help})
+        return {
+            "prog": self.prog,
+            "usage": self.format_usage().strip(),
+            "description": self.description,
+            "options": options,
+            "args": args,
+            "subcommands": subcommands,
+        }
+
+
+class Lazy:
+    """
+    A default evaluated only when a function is called without its arg, so that building
+    the CLI or calling another function doesn't pay for it:
+
+        def build(jobs: int = funcli.Lazy(os.cpu_count)):
+            ...
+
+    It's evaluated for each call. The help shows its placeholder instead of its value.
+    A str value is converted to the type of the arg like an argv value.
+    """
+    __slots__ = ("function", "placeholder")
+
+    # Modules implemented in C, shown as the module they're used from
+    MODULE_NAMES = {"builtins": "", "posix": "os", "nt": "os", "_io": "io", "_operator": "operator", "_random": "random"}
+
+    def __init__(self, function, placeholder: str = None):
+        """
+        :param function: Called without args to get the default value
+        :param placeholder: Shown in the help. Default to the function name. Eg: "os.cpu_count()"
+        """
+        self.function = function
+        if placeholder is None:
+            module = getattr(function, "__module__", None) or ""
+            module = self.MODULE_NAMES.get(module, module)
+            placeholder = f"{module}.{getattr(function, '__qualname__', function)}()".lstrip(".")
+        self.placeholder = placeholder
+
+    @classmethod
+    def env(cls, name: str, default=None) -> "Lazy":
+        """
+        :param name: An environment variable name
+        :param default: The value when the variable is not set
+        :return: A default read from the environment when the function is called
+        """
+        return cls(lambda: os.environ.get(name, default), placeholder=f"${name}")
+
+    def __call__(self):
+        return self.function()
+
+    def __repr__(self):
+        return self.placeholder
+
+
+@dataclass(frozen=True)
 class Arg:
-    name: str = None
-    required: bool = False
-    
-    original_type: type = None
-    translated_type: type = str
-    original_type_name: str = None
-    translated_type_name: str = None
-    
-    help: str = None
-    
-    default = None
-    default_repr: str = ""
-    
-    description: str = ""
-    description_repr: str = ""
+    """
+    Definition of an arg of a function.
+
+    Args are kept for the whole life of the process, so only what is needed to parse
+    and cast values is stored. Strings only needed by the help are computed when read.
+    """
+    __slots__ = ("name", "required", "original_type", "translated_type", "default", "function", "doc_index")
+
+    name: str
+    required: bool
+
+    original_type: type
+    translated_type: type
+
+    default: typing.Any
+
+    function: callable  # The function of the arg, used to extract the description
+    doc_index: "DocIndex"  # The descriptions of the CLI, shared by every arg
+
+    @property
+    def original_type_name(self):
+        if self.is_enum():
+            return self.get_final_type()
+        type_name = get_type_name(self.original_type if self.original_type is not None else str)
+        if self.is_list():
+            if self.get_final_type() == list:  # If arg is a list of unspecified type, this is a list[str]
+                return get_type_name(list[str])
+            return type_name.replace("list", "").replace("[", "").replace("]", "")
+        return type_name
+
+    @property
+    def translated_type_name(self):
+        return get_type_name(self.translated_type)
+
+    @property
+    def default_repr(self):
+        if self.translated_type == str and not self.is_list() and not isinstance(self.default, Lazy):  # Add quotes to str
+            return f"'{self.default}'"
+        return self.default
+
+    @property
+    def description(self):
+        return self.doc_index.get_arg_description(self.function, self.name)
+
+    @property
+    def description_repr(self):
+        description = self.description
+        return f": {description}" if description != "" else f""  # Handle empty description
+
+    @property
+    def type_text(self):
+        if self.is_enum():
+            return "|".join(self.get_choices())
+        return self.original_type_name
+
+    @property
+    def default_text(self):
+        if self.required:
+            return ""
+        if self.is_list() and isinstance(self.default, (list, tuple)):
+            values = self.default
+        else:
+            values = [self.default]
+        texts = [
+            value.name if isinstance(value, enum.Enum) else repr(value) if isinstance(value, str) else str(value)
+            for value in values
+        ]
+        if self.is_list() and isinstance(self.default, (list, tuple)):
+            return ", ".join(texts) if texts else "[]"
+        return texts[0]
+
+    @property
+    def help_row(self):
+        return HelpRow(
+            required=self.required,
+            multiple=self.is_list(),
+            type_name=self.type_text,
+            default=self.default_text,
+            description=self.description,
+        )
+
+    @property
+    def help(self):
+        return (
+            f"[{'REQUIRED' if self.required else 'optional'}, "
+            f"{self.original_type_name}, "
+            f"default:{self.default_repr}]"
+            f"{self.description_repr}"
+        )
 
     def get_final_type(self):
         if typing.get_origin(self.original_type) == list:
@@ -70,12 +424,16 @@ class Arg:
         return self.original_type
 
     def is_enum(self):
-        return issubclass(self.get_final_type(), enum.Enum)
+        return isinstance(self.get_final_type(), type) and issubclass(self.get_final_type(), enum.Enum)
 
     def is_list(self):
         if typing.get_origin(self.original_type) == list:
             return True
-        return issubclass(self.original_type, list)
+        # Untyped args and typing annotations (eg: piped typing.Iterable) are not classes
+        return isinstance(self.original_type, type) and issubclass(self.original_type, list)
+
+    def is_file(self):
+        return self.get_final_type() in FILE_TYPES
     
     def get_action(self, log_indent: int = 0):
         if self.translated_type == bool:
@@ -117,404 +475,3118 @@ class Arg:
         log.debug("\t" * log_indent + f"{self.description=}")
         log.debug("\t" * log_indent + f"{self.description_repr=}")
 
-@dataclass
+@dataclass(frozen=True)
 class Function:
+    __slots__ = ("name", "fun", "descr", "args", "validator")
+
     name: str
     fun: callable
-    descr: str = ""
-    args: dict = None
-    
-    def __post_init__(self):
-        if self.args is None:
-            self.args = {}
+    descr: str
+    args: typing.Mapping[str, Arg]  # Read only, a Function is shared by every thread calling it
+    validator: "Validator"  # The constraints of the args, checked before the call
 
-definitions: dict[str: Function] = {}
 
+class Constraint(abc.ABC):
+    """
+    A constraint on the value of an arg, given as typing.Annotated metadata:
 
-def get_type_name(a_type, log_indent: int = 0) -> str:
-    if type(a_type) == type:  # If it's a basic type like int, str, bool...
-        # Get the type name this way
-        log.debug("\t"*log_indent+f"get_type_name type {a_type.__name__} is builtin")
-        return a_type.__name__
-    else:  # If it's a more specific type like list[int]...
-        # Get the type name that way
-        log.debug("\t"*log_indent+f"get_type_name type {str(a_type)} is NOT builtin")
-        return str(a_type)
+        def report(year: typing.Annotated[int, funcli.Range(2000, 2030)]):
+            ...
 
+    The constraints of list args apply to each item, except Len.
+    """
 
-def get_type_from_str(type_name: str) -> type:
-    try:
-        # Builtin types
-        a_type = eval(type_name)
-        log.debug(f"get_type_from_str type is builtin")
-        return a_type
-    except NameError:
-        # Custom types
-        module_nbr = type_name.count(".")
-        if module_nbr == 0:
-            # If no module specified
-            log.debug(f"get_type_from_str IMplicit module")
-            return getattr(sys.modules[__name__], type_name)
-        else:
-            # If a module is specified
-            log.debug(f"get_type_from_str EXplicit module")
-            module_name, type_name = type_name.split(sep=".")
-            return getattr(sys.modules[module_name], type_name)
+    @abc.abstractmethod
+    def check(self, value) -> str:
+        """
+        :param value: A cast value, never None
+        :return: Why the value is invalid, None if it's valid
+        """
 
 
-"""
-def print_help_and_exit(exception: Exception, parser: argparse.ArgumentParser):
-    print(f"ERROR: {exception.__str__()}")
-    print()
-    parser.print_help()
-    print()
-    print(f"ERROR: {exception.__str__()}")
-    print()
-    sys.exit(1)
-"""
+@dataclass(frozen=True)
+class Range(Constraint):
+    """A value between min and max, both included. Eg: Range(0, 100), Range(min=0)"""
+    min: typing.Any = None
+    max: typing.Any = None
+
+    def check(self, value) -> str:
+        if (self.min is not None and value < self.min) or (self.max is not None and value > self.max):
+            if self.max is None:
+                return f"must be >= {self.min}, got {value}"
+            if self.min is None:
+                return f"must be <= {self.max}, got {value}"
+            return f"must be between {self.min} and {self.max}, got {value}"
+        return None
+
+
+@dataclass(frozen=True)
+class Len(Constraint):
+    """A str or list of min to max items, both included. Eg: Len(1, 3), Len(max=10)"""
+    min: int = None
+    max: int = None
+
+    def check(self, value) -> str:
+        if (self.min is not None and len(value) < self.min) or (self.max is not None and len(value) > self.max):
+            if self.max is None:
+                return f"length must be >= {self.min}, got {len(value)}"
+            if self.min is None:
+                return f"length must be <= {self.max}, got {len(value)}"
+            return f"length must be between {self.min} and {self.max}, got {len(value)}"
+        return None
 
-def fun_to_cli(functions, default_function_name: str = "", exit_on_error=True):
+
+class Pattern(Constraint):
+    """A str fully matching a regex. Eg: Pattern(r"[a-z]+")"""
+
+    def __init__(self, regex: str, flags: int = 0):
+        self.regex = re.compile(regex, flags)  # Compiled once, with the definitions
+
+    def __repr__(self):
+        return f"Pattern({self.regex.pattern!r})"
+
+    def check(self, value) -> str:
+        if self.regex.fullmatch(str(value)) is None:
+            return f"must match '{self.regex.pattern}', got '{value}'"
+        return None
+
+
+@dataclass(frozen=True)
+class CrossConstraint:
+    """A constraint on several args of a function, see constraint."""
+    check: callable  # Takes the args by name, returns False when they are invalid
+    arg_names: tuple
+    message: str
+
+
+def constraint(check, message: str):
     """
-    Turn functions into cli utility.
+    Add a constraint on several args of a function. The check receives the args named
+    in its signature and returns False when they are invalid.
 
-    Give it a list of functions and it will:
-    - Build an arg parser to parse cli commands
-    - Automatically generate the cli help using docstring witch description, arg type, default value...
-    - Handle raised funcli.*Error exceptions raised by the called function by displaying an error, help and exiting properly
+        @funcli.constraint(lambda lang, score: len(lang) == len(score), "give a score for each lang")
+        def hello(lang: list[str], score: list[int]):
+            ...
 
-    :param functions: A list of functions. Eg: [print, json.dumps, ]
-    :param default_function_name: The name of the default function if no subcommand is called in CLI
-            It can only be a function that takes no required args
-    :param exit_on_error: Force parser to exit script if error happen in parsing args
-    :return: (parser, parsed_args, function_result)
+    :param check: The check
+    :param message: The error message when the check fails
+    :return: A decorator
     """
+    def decorator(function):
+        arg_names = tuple(inspect.signature(check).parameters)
+        unknown = [name for name in arg_names if name not in inspect.signature(function).parameters]
+        if unknown:
+            raise ValueError(f"{function.__name__}() has no arg {', '.join(unknown)}")
+        constraints = getattr(function, "__funcli_constraints__", [])
+        function.__funcli_constraints__ = [CrossConstraint(check, arg_names, message)] + constraints
+        return function
 
-    def get_arg_description(
-        arg_name, docstring, arg_delimiter_start=":param ", arg_delimiter_end=":", return_delimiter=":return:"
-    ):
+    return decorator
+
+
+def split_annotated(annotation) -> tuple:
+    """
+    Split the constraints from an annotation, see Constraint.
+    :param annotation: A parameter annotation. Eg: Annotated[int, Range(0, 10)], list[Annotated[str, Len(1)]]
+    :return: (annotation without constraints, [(constraint, applies to each item)])
+    """
+    constraints = []
+    is_list = False
+    if typing.get_origin(annotation) is typing.Annotated:
+        is_list = typing.get_origin(annotation.__origin__) == list or (
+            isinstance(annotation.__origin__, type) and issubclass(annotation.__origin__, list)
+        )
+        for metadata in annotation.__metadata__:
+            if isinstance(metadata, Constraint):
+                constraints.append((metadata, is_list and not isinstance(metadata, Len)))
+        annotation = annotation.__origin__
+    if typing.get_origin(annotation) == list and typing.get_args(annotation):
+        item_annotation = typing.get_args(annotation)[0]
+        if typing.get_origin(item_annotation) is typing.Annotated:
+            for metadata in item_annotation.__metadata__:
+                if isinstance(metadata, Constraint):
+                    constraints.append((metadata, True))
+            annotation = list[item_annotation.__origin__]
+    return annotation, constraints
+
+
+class Validator:
+    """
+    The constraints of a function, compiled with its definition into a single check of its args.
+    It's run before the function is called and raises an ArgError for the first invalid arg.
+    """
+
+    def __init__(self, arg_constraints: list, cross_constraints: list):
         """
-        Parse docstring to extract arg_name's description.
-        :param arg_name: An arg name
-        :param docstring: A docstring describing multiple args
-        :param arg_delimiter_start: The delimiter for start of arg
-        :param arg_delimiter_end: The delimiter for end of arg
-        :param return_delimiter: The return delimiter
-        :return: The arg description
+        :param arg_constraints: The constraints of each arg, as (arg_name, constraint, applies to each item)
+        :param cross_constraints: The CrossConstraint of the function
         """
-        if docstring is None or docstring == "":
-            return ""
-        
-        tag = f"{arg_delimiter_start}{arg_name}{arg_delimiter_end}"
-        arg_found = False
-        description = ""
-        for line in docstring.splitlines():
-            if tag in line:
-                arg_found = True
-                line = line.replace(tag, "").strip()
-                description += line + os.linesep
-            elif arg_found and arg_delimiter_start not in line and return_delimiter not in line:
-                line = line.strip()
-                description += line + os.linesep
-            elif arg_found and arg_delimiter_start in line:
-                arg_found = False
-                break
-            else:
-                pass
-        return description.strip()
-
-    def extract_description_from_docstring(docstring):
-        description = ""
-        for line in docstring.splitlines():
-            line = line.strip()  # Strip line
-            # If end of description is detected
-            if line.startswith(":param ") or line.startswith(":return:"):
-                break  # Break
-            else:  # If still in description
-                description += line + os.linesep
-        return description.strip()
-    
-    
-    # Parse args definitions
-    log.debug(f"Parsing definitions...")
-    log.debug(f"----------------------")
-    
-    # reorganise functions in a dict
-    functions = {func.__name__: func for func in functions}
+        self.arg_constraints = tuple(arg_constraints)
+        self.cross_constraints = tuple(cross_constraints)
 
-    # Get script details
-    try:
-        from __main__ import __app_name__ as module_name
+    def __bool__(self):
+        return bool(self.arg_constraints or self.cross_constraints)
 
-        if module_name == "__main__":
-            module_name = "Anonymous script"
-    except ImportError as e:
-        module_name = "Anonymous script"
-    log.debug(f"{module_name=}")
-    
-    try:
-        from __main__ import __version__ as module_version
-    except ImportError as e:
-        module_version_info = ("0", "0", "0")
-        module_version = ".".join(module_version_info)
-    log.debug(f"{module_version=}")
-    
-    try:
-        from __main__ import __author__ as module_author
-    except ImportError as e:
-        module_author = "Anonymous author"
-    log.debug(f"{module_author=}")
-    
-    module_version_repr = f"{module_name} version:{module_version} by {module_author}"
-    log.debug(f"{module_version_repr=}")
-    
-    try:
-        from __main__ import __doc__ as module_doc
-        if module_doc is None:
-            module_doc = ""
-    except ImportError as e:
-        module_doc = ""
-    module_doc = module_version_repr + os.linesep + module_doc
-    log.debug(f"{module_doc=}")
-
-    # Init arg parser
-    parser = argparse.ArgumentParser(
-        description=module_doc, exit_on_error=exit_on_error, formatter_class=argparse.RawTextHelpFormatter
-    )
-    subparsers = parser.add_subparsers(dest="subcommand")
+    def __call__(self, args: dict):
+        """
+        Check the cast args. Args that are not given (eg: piped args) are not checked.
+        :param args: The cast args
+        """
+        for arg_name, arg_constraint, per_item in self.arg_constraints:
+            value = args.get(arg_name)
+            if value is None:
+                continue
+            for index, item in enumerate(value) if per_item else [(None, value)]:
+                message = arg_constraint.check(item)
+                if message is not None:
+                    raise ArgError(arg_name, message if index is None else f"item {index + 1} {message}")
+        for cross_constraint in self.cross_constraints:
+            if any(arg_name not in args for arg_name in cross_constraint.arg_names):
+                continue
+            if not cross_constraint.check(**{arg_name: args[arg_name] for arg_name in cross_constraint.arg_names}):
+                raise ArgError(", ".join(cross_constraint.arg_names), cross_constraint.message)
 
-    # For each function
-    for function_name, function in functions.items():
-        log.debug(f"{function_name=}")
-        fun = Function(name=function_name, fun=function)
-        definitions[fun.name] = fun
-        
-        # Create a parser for each function
-        # Tag default function in help
-        if fun.name == default_function_name:
-            function_help = f"[default if no subcommand provided]" + os.linesep
-            log.debug(f"    DEFAULT if no subcommand provided")
-            
-        # Use docstring as help
-        if function.__doc__ is not None:
-            fun.descr += extract_description_from_docstring(function.__doc__)
-        
-        subparser = subparsers.add_parser(
-            name=fun.name,
-            help=fun.descr,
-            description=fun.descr,
-            formatter_class=argparse.RawTextHelpFormatter,
-        )
 
-        # If there are args, add them to CLI
-        for arg_name, parameter in inspect.signature(function).parameters.items():
-            log.debug(f"    {arg_name=}")
-            arg = Arg(name=arg_name)
-            arg.default = parameter.default
-            fun.args[arg.name] = arg
-            
-            # Detect type
-            if parameter.annotation != inspect._empty:  # Annotated
-                arg.original_type = parameter.annotation
-                arg.translated_type = parameter.annotation
-                log.debug(f"        type is explicitly defined as {arg.original_type=}")
-                
-            elif arg.default != inspect._empty:  # Not annotated but default value
-                if arg.default is not None:
-                    arg.original_type = type(arg.default)
-                    arg.translated_type = type(arg.default)
-                else:
-                    arg.original_type = None
-                    arg.translated_type = str
-                log.debug(f"        type is implicitly defined as {arg.original_type=}")
-                
-            else:  # Not annotated and no default value
-                arg.original_type = None
-                arg.translated_type = str
-                log.debug(f"        type is unknown")
-                
-                
-            # Advanced type detection for list
-            arg.original_type_name: str = get_type_name(arg.translated_type, log_indent=1)
-            if arg.is_list():
-                arg.original_type_name = arg.original_type_name.replace("list", "").replace("[", "").replace("]", "")
-                
-                if arg.is_list() and arg.get_final_type() == list:  # If arg is a list of unspecified type, this is a list[str]
-                    arg.translated_type = str
-                    arg.original_type_name = get_type_name(list[str])
-                    log.debug(f"        type is list[unspecified] and will be considered as list[str]")
-                else:  # If list[str], list[int]...
-                    arg.translated_type = get_type_from_str(arg.original_type_name)
-                    log.debug(f"        type is list[{arg.get_final_type()}] and will be considered as list[{arg.get_final_type()}]")
-            
-            
-            # Advanced type detection for Enums
-            if arg.is_enum():
-                arg.original_type_name = arg.get_final_type()
-                arg.translated_type = str
-                log.debug(f"        type is Enum({arg.original_type_name})")
-                
-            # Fix default value
-            if arg.default == inspect._empty:
-                arg.default = None
-                arg.required = True
-            log.debug(f"        {arg.default=}")
-            log.debug(f"        {arg.required=}")
-            
-            # Build help
-            if arg.translated_type == str and not arg.is_list():  # Add quotes to str
-                arg.default_repr = f"'{arg.default}'"
-            else:
-                arg.default_repr = arg.default
-
-            arg.description = get_arg_description(arg.name, function.__doc__)
-            arg.description_repr = (
-                f": {arg.description}" if arg.description != "" else f""
-            )  # Handle empty arg.description
-            arg.help = (
-                f"[{'REQUIRED' if arg.required else 'optional'}, "
-                f"{arg.original_type_name}, "
-                f"default:{arg.default_repr}]"
-                f"{arg.description_repr}"
-            )
-            
-            arg.print(log_indent=1)
-            
-            subparser.add_argument(
-                f"--{arg.name}",
-                action=arg.get_action(log_indent=1),
-                default=arg.default,
-                type=arg.translated_type,
-                choices=arg.get_choices(log_indent=1),
-                required=arg.required,
-                help=arg.help,
-            )
+class HelpFormatter(argparse.RawTextHelpFormatter):
+    """
+    Help formatter rendering the help of funcli args only when the help is displayed.
 
-    # Add a full help option
-    full_help = ""
-    subparsers_actions = [action for action in parser._actions if isinstance(action, argparse._SubParsersAction)]
-    for subparsers_action in subparsers_actions:
-        # get all subparsers and print help
-        for choice, subparser in subparsers_action.choices.items():
-            full_help += os.linesep + "-" * 80 + os.linesep + os.linesep
-            full_help += f"Help for subcommand '{choice}':" + os.linesep
-            full_help += subparser.format_help()
-    parser.add_argument(f"--full-help", action="store_true", default=False, help="show help for every subcommands")
-
-    # Add a version option
-    #parser.add_argument("--version", action="version", version=module_version_repr)
-    parser.add_argument(f"--version", action="store_true", default=False, help="show version")
-    
-    
-    
-    # Parse actual args values
-    log.debug(f"")
-    log.debug(f"")
-    log.debug(f"Parsing call...")
-    log.debug(f"---------------")
-    
-    # Extract options as a dict
-    if len(sys.argv) >= 2 and sys.argv[1] in list(functions.keys()):
-        # If subcommand provided
-        log.debug(f"    subcommand provided")
-        parsed_args = vars(parser.parse_args(sys.argv[1:]))
-    else:
-        # Else, if subcommand was NOT provided
-        log.debug(f"    subcommand NOT provided")
-
-        # If a specific flag is found, revert to default
-        specific_flag_found = False
-        for flag in ["-h", "--help", "--full-help", "--version"]:
-            if flag in sys.argv:
-                log.debug(f"    specific_flag_found=True")
-                parsed_args = vars(parser.parse_args(sys.argv[1:]))
-                specific_flag_found = True
-                break
+    The argparse action of a funcli arg has a placeholder help and a funcli_arg attribute
+    holding its Arg.
+    """
 
-        # If a specific flag is NOT found, inject default_function_name into argv
-        if not specific_flag_found:
-            parsed_args = vars(parser.parse_args([default_function_name] + sys.argv[1:]))
-    log.debug(f"    {parsed_args=}")
-    
-    
-    # If full help is called, display it
-    if parsed_args["full_help"]:
-        parser.print_help()
-        print(f"{full_help}")
-        if exit_on_error:
-            sys.exit(0)
-    del parsed_args["full_help"]  # Clean parsed_args for further processing by the function
-
-    # If version is called, display it
-    if parsed_args["version"]:
-        print(f"{module_version_repr}")
-        if exit_on_error:
-            sys.exit(0)
-    del parsed_args["version"]  # Clean parsed_args for further processing by the function
-    
-    
-    # Select fun to call
-    if not parsed_args["subcommand"]:
-        if default_function_name == "":
-            print("Subcommand required!")
-            parser.print_usage()
-            if exit_on_error:
-                sys.exit(1)
+    def _get_help_string(self, action):
+        arg = getattr(action, "funcli_arg", None)
+        if arg is not None:
+            return arg.help.replace("%", "%%")
+        return super()._get_help_string(action)
+
+
+ARG_HELP_PLACEHOLDER = "-"  # Replaced by the Arg help when rendered by HelpFormatter
+
+
+@dataclass(frozen=True)
+class HelpRow:
+    """The columns of an arg in the help, see HelpTable."""
+    __slots__ = ("required", "multiple", "type_name", "default", "description")
+
+    required: bool
+    multiple: bool  # A list arg, given as many times as needed
+    type_name: str
+    default: str  # Rendered for humans: str quoted, enums by name, lists without brackets
+    description: str
+
+
+def get_help_row(action: argparse.Action) -> HelpRow:
+    """
+    :param action: An argparse action
+    :return: The help columns of a funcli arg, None for other actions
+    """
+    arg = getattr(action, "funcli_arg", None)
+    if arg is not None:
+        return arg.help_row
+    return getattr(action, "funcli_help_row", None)
+
+
+class HelpTable:
+    """
+    The args of a function rendered as a table, one row per arg.
+
+    Cells and column widths are computed once, when the help is first rendered.
+    Only the description column depends on the terminal width: it's wrapped to
+    the remaining space when rendered.
+    """
+
+    HEADERS = ("ARG", "REQUIRED", "COUNT", "TYPE", "DEFAULT", "DESCRIPTION")
+    MIN_DESCRIPTION_WIDTH = 20
+
+    def __init__(self, rows: list):
+        """
+        :param rows: The args, as (invocation, HelpRow). Eg: ("--year YEAR", HelpRow(...))
+        """
+        self.cells = [self.HEADERS[:-1]] + [
+            (
+                invocation,
+                "REQUIRED" if row.required else "optional",
+                "multiple" if row.multiple else "single",
+                row.type_name,
+                row.default,
+            )
+            for invocation, row in rows
+        ]
+        self.descriptions = [self.HEADERS[-1]] + [row.description for _, row in rows]
+        self.widths = [max(len(cell) for cell in column) for column in zip(*self.cells)]
+        self.description_offset = sum(width + 2 for width in self.widths)
+
+    def render(self, width: int) -> str:
+        """
+        :param width: The number of chars available per line
+        :return: The table
+        """
+        description_width = max(width - self.description_offset, self.MIN_DESCRIPTION_WIDTH)
+        lines = []
+        for cells, description in zip(self.cells, self.descriptions):
+            prefix = "".join(cell.ljust(column_width + 2) for cell, column_width in zip(cells, self.widths))
+            wrapped = [
+                wrapped_line
+                for line in description.splitlines()
+                for wrapped_line in textwrap.wrap(line, description_width) or [""]
+            ] or [""]
+            lines.append(prefix + wrapped[0])
+            lines.extend(" " * self.description_offset + line for line in wrapped[1:])
+        return os.linesep.join(line.rstrip() for line in lines)
+
+
+SCHEMA_VERSION = 2
+
+# Arg types parsed without importing the function, by their name in the schema
+SCHEMA_TYPES = {str: "str", int: "int", float: "float", bool: "bool", existing_file: "file"}
+SCHEMA_CONVERTERS = {"str": str, "int": int, "float": float, "bool": bool, "file": existing_file, None: str}
+
+
+def to_json(value):
+    """
+    Convert a default value to JSON serializable data.
+    :param value: A default value
+    :return: Enums as their names, lists item by item, anything unknown as its str
+    """
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+# The definitions of the last built CLI. Replaced rather than mutated when a function is added,
+# so threads reading or iterating it never see it change
+definitions: dict[str: Function] = {}
+
+
+def get_cache_dir() -> str:
+    """
+    Get the directory where funcli stores its on-disk caches.
+    It can be changed with the FUNCLI_CACHE_DIR environment variable.
+    :return: The cache directory path
+    """
+    return os.environ.get("FUNCLI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "funcli"))
+
+
+@dataclass
+class CacheOptions:
+    ttl: float = 24 * 60 * 60  # Time to live of a cached result, in seconds
+
+
+def cacheable(function=None, *, ttl: float = CacheOptions.ttl):
+    """
+    Mark a function as cacheable: its result only depends on its args.
+
+    When a cacheable function is called through the CLI with args already seen,
+    the call is skipped and the previous result is returned from funcli.result_cache.
+    Only the returned value is cached, what the function prints is not replayed.
+
+        @funcli.cacheable(ttl=3600)
+        def report(year: int):
+            ...
+
+    :param function: The function to mark (when used without parenthesis)
+    :param ttl: Time to live of a cached result, in seconds
+    :return: The function itself, or a decorator
+    """
+    def decorator(function):
+        function.__funcli_cache__ = CacheOptions(ttl=ttl)
+        return function
+
+    if function is None:
+        return decorator
+    return decorator(function)
+
+
+class ResultCache:
+    """
+    On-disk store for the results of cacheable functions.
+
+    Each entry is a pickle file named after its key.
+    Entries expire after their ttl and the least recently used ones are evicted
+    when the total size of the store exceeds max_size.
+    """
+
+    def __init__(self, directory: str = None, max_size: int = 100 * 1024 * 1024):
+        """
+        :param directory: Where to store results. Default to <cache dir>/results
+        :param max_size: Max total size of the stored results, in bytes
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.stats_lock = threading.Lock()  # Counted from every thread calling cacheable functions
+
+    def count(self, hit: bool):
+        with self.stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def log_stats(self):
+        # The counters only live as long as the process, they're logged after each run
+        if self.hits or self.misses:
+            log.debug(f"result cache: {self.hits} hits, {self.misses} misses")
+
+    def get_directory(self) -> str:
+        if self.directory is None:
+            return os.path.join(get_cache_dir(), "results")
+        return self.directory
+
+    @staticmethod
+    def make_key(function, parsed_args: dict, file_args: list = ()) -> str:
+        """
+        Build the cache key of a call.
+        :param function: The called function
+        :param parsed_args: The cast args the function is called with
+        :param file_args: The names of the file args, whose files are keyed by path, mtime and size
+        :return: A hex digest identifying the call
+        """
+        key = hashlib.sha256()
+        key.update(f"{function.__module__}.{function.__qualname__}".encode())
+        key.update(ResultCache.code_repr(function.__code__).encode())
+        # Not repr: it can hold memory addresses, the key must be the same in every process
+        key.update(json.dumps(parsed_args, default=to_json, sort_keys=True).encode())
+        for name in file_args:
+            paths = parsed_args.get(name)
+            for path in paths if isinstance(paths, list) else [paths]:
+                if path is None:
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                key.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        return key.hexdigest()
+
+    @staticmethod
+    def code_repr(value) -> str:
+        """
+        Describe the code of a function the same way in every process: the repr of nested code
+        objects (comprehensions, lambdas...) holds their address, and sets are in hash order.
+        :param value: A code object or one of its constants
+        :return: The description
+        """
+        if isinstance(value, types.CodeType):
+            return f"code({value.co_code.hex()}, {ResultCache.code_repr(value.co_consts)})"
+        if isinstance(value, tuple):
+            return f"({', '.join(ResultCache.code_repr(item) for item in value)})"
+        if isinstance(value, frozenset):
+            return f"frozenset({sorted(ResultCache.code_repr(item) for item in value)})"
+        return repr(value)
+
+    def get(self, key: str):
+        """
+        Get a cached result.
+        :param key: The cache key
+        :return: (hit, value)
+        """
+        path = os.path.join(self.get_directory(), key)
+        try:
+            with open(path, "rb") as file:
+                expires_at, value = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            self.count(hit=False)
+            return False, None
+
+        if expires_at < time.time():
+            log.debug(f"cache entry {key} expired")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.count(hit=False)
+            return False, None
+
+        try:
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:  # Evicted by another job meanwhile, the value was read already
+            pass
+        self.count(hit=True)
+        return True, value
+
+    def set(self, key: str, value, ttl: float = CacheOptions.ttl):
+        """
+        Store a result. Values that can't be pickled are not cached.
+        :param key: The cache key
+        :param value: The result to cache
+        :param ttl: Time to live of the result, in seconds
+        """
+        try:
+            data = pickle.dumps((time.time() + ttl, value))
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            log.debug(f"result can't be cached: {e}")
+            return
+
+        directory = self.get_directory()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = os.path.join(directory, f".{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as file:
+                file.write(data)
+            os.replace(tmp_path, os.path.join(directory, key))  # Atomic, concurrent jobs never read half written entries
+            self.evict()
+        except OSError as e:  # The result was computed, don't fail the call
+            log.debug(f"result can't be cached: {e}")
+
+    def evict(self):
+        """Remove the least recently used entries until the store fits in max_size."""
+        directory = self.get_directory()
+        entries = []
+        total_size = 0
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # Evicted by another job meanwhile
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
+
+    def clear(self):
+        """Remove every entry and reset counters."""
+        directory = self.get_directory()
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                os.remove(os.path.join(directory, name))
+        with self.stats_lock:
+            self.hits = 0
+            self.misses = 0
+
+
+result_cache = ResultCache()
+
+
+@dataclass(frozen=True)
+class JournalEntry:
+    """A call recorded by a Journal."""
+    __slots__ = ("id", "time", "command", "argv", "args", "duration", "exit_status", "result_size")
+
+    id: int
+    time: float  # When the call started, as a timestamp
+    command: str  # The subcommand, or the subcommands of a pipeline separated by PIPELINE_SEPARATOR
+    argv: list  # What to run again to replay the call
+    args: dict  # The cast args, as JSON
+    duration: float  # In seconds
+    exit_status: int  # 0 when the function returned, 1 when it failed
+    result_size: int  # The len of a sized result, 0 for None, else 1. Streamed results are counted as 1
+
+
+class Journal:
+    """
+    Append-only log of the calls of a Cli, stored in SQLite and indexed by command and time.
+
+    The call path only queues the entries: a background thread writes them in batches of
+    batch_size, or every flush_interval seconds, and when the process exits.
+    Once there are more than max_entries, the oldest entries are deleted.
+
+        cli = funcli.Cli(functions, journal=funcli.Journal())
+        slowest = cli.journal.find(command="report", slowest=True, limit=10)
+    """
+
+    def __init__(
+        self, path: str = None, max_entries: int = 100_000, batch_size: int = 100, flush_interval: float = 1.0
+    ):
+        """
+        :param path: The SQLite file. Default to <cache dir>/journal.sqlite
+        :param max_entries: Max number of entries kept
+        :param batch_size: Max number of entries written at once
+        :param flush_interval: Max number of seconds an entry is queued before being written
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = None
+        self.writer = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def get_path(self) -> str:
+        if self.path is None:
+            return os.path.join(get_cache_dir(), "journal.sqlite")
+        return self.path
+
+    def connect(self) -> "sqlite3.Connection":
+        import sqlite3  # Only imported when a journal is used
+        os.makedirs(os.path.dirname(os.path.abspath(self.get_path())), exist_ok=True)
+        connection = sqlite3.connect(self.get_path(), timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                time REAL NOT NULL,
+                command TEXT NOT NULL,
+                argv TEXT NOT NULL,
+                args TEXT NOT NULL,
+                duration REAL NOT NULL,
+                exit_status INTEGER NOT NULL,
+                result_size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_command_time ON entries (command, time);
+            CREATE INDEX IF NOT EXISTS entries_time ON entries (time);
+        """)
+        return connection
+
+    def record(self, command: str, argv: list, args: dict, started: float, duration: float, exit_status: int, result):
+        """
+        Queue a call to be written.
+        :param command: The subcommand
+        :param argv: The args the CLI was run with
+        :param args: The cast args
+        :param started: When the call started, as a timestamp
+        :param duration: In seconds
+        :param exit_status: 0 when the function returned, 1 when it failed
+        :param result: The function result, only its size is recorded
+        """
+        if result is None:
+            result_size = 0
+        else:
+            try:
+                result_size = len(result)
+            except TypeError:
+                result_size = 1
+        row = (
+            started,
+            command,
+            json.dumps(argv),
+            json.dumps(args, default=to_json),
+            duration,
+            exit_status,
+            result_size,
+        )
+        with self.lock:
+            if self.writer is None or self.pid != os.getpid():  # Also restart the writer in forked processes
+                import queue
+                self.pid = os.getpid()
+                self.queue = queue.Queue()
+                self.writer = threading.Thread(target=self.write, args=(self.queue,), name="funcli-journal", daemon=True)
+                self.writer.start()
+                atexit.register(self.close)
+            self.queue.put(row)
+
+    def write(self, entries: "queue.Queue"):
+        """The loop of the writer thread: write the queued entries in batches."""
+        import queue
+        import sqlite3
+        try:
+            connection = self.connect()
+        except (OSError, sqlite3.Error) as e:  # Keep draining the queue, so the calls and flushes don't wait forever
+            log.warning(f"journal {self.get_path()} can't be opened, the calls are not recorded: {e}")
+            connection = None
+        running = True
+        while running:
+            batch = [entries.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and isinstance(batch[-1], tuple):
+                try:
+                    batch.append(entries.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            rows = [item for item in batch if isinstance(item, tuple)]
+            if rows and connection is not None:
+                try:
+                    with connection:
+                        connection.executemany(
+                            "INSERT INTO entries (time, command, argv, args, duration, exit_status, result_size) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            rows,
+                        )
+                        connection.execute(
+                            "DELETE FROM entries WHERE id <= (SELECT MAX(id) FROM entries) - ?", (self.max_entries,)
+                        )
+                except sqlite3.Error as e:
+                    log.warning(f"journal entries lost: {e}")
+            for item in batch:
+                if item is None:  # Closed
+                    running = False
+                elif isinstance(item, threading.Event):  # Flushed
+                    item.set()
+        if connection is not None:
+            connection.close()
+
+    def flush(self):
+        """Wait until the queued entries are written."""
+        with self.lock:
+            writer = self.writer
+            if writer is None or self.pid != os.getpid():
+                return
+            flushed = threading.Event()
+            self.queue.put(flushed)
+        while not flushed.wait(0.1):
+            if not writer.is_alive():  # The flush marker will never be handled
+                return
+
+    def close(self):
+        """Write the queued entries and stop the writer thread."""
+        with self.lock:
+            writer = self.writer
+            if writer is None or self.pid != os.getpid():
+                return
+            self.queue.put(None)
+            self.writer = None
+        writer.join()
+        atexit.unregister(self.close)
+
+    def to_entry(self, row: tuple) -> JournalEntry:
+        entry_id, started, command, argv, args, duration, exit_status, result_size = row
+        return JournalEntry(
+            id=entry_id,
+            time=started,
+            command=command,
+            argv=json.loads(argv),
+            args=json.loads(args),
+            duration=duration,
+            exit_status=exit_status,
+            result_size=result_size,
+        )
+
+    def get(self, entry_id: int) -> JournalEntry:
+        """
+        :param entry_id: The entry id
+        :return: The entry, None if it's unknown or deleted
+        """
+        self.flush()
+        connection = self.connect()
+        try:
+            row = connection.execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        finally:
+            connection.close()
+        return self.to_entry(row) if row is not None else None
+
+    def find(
+        self,
+        command: str = None,
+        since: float = None,
+        until: float = None,
+        min_duration: float = None,
+        slowest: bool = False,
+        limit: int = 100,
+    ) -> list:
+        """
+        Search the entries.
+        :param command: Only the calls of this subcommand
+        :param since: Only the calls started from this timestamp
+        :param until: Only the calls started before this timestamp
+        :param min_duration: Only the calls lasting at least this number of seconds
+        :param slowest: Sort by duration, the slowest first. Else the most recent first
+        :param limit: Max number of entries
+        :return: The JournalEntry found
+        """
+        conditions = []
+        params = []
+        for condition, value in [
+            ("command = ?", command), ("time >= ?", since), ("time < ?", until), ("duration >= ?", min_duration)
+        ]:
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        query = "SELECT * FROM entries"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY duration DESC" if slowest else " ORDER BY time DESC, id DESC"
+        query += " LIMIT ?"
+        params.append(limit)
+
+        self.flush()
+        connection = self.connect()
+        try:
+            return [self.to_entry(row) for row in connection.execute(query, params)]
+        finally:
+            connection.close()
+
+
+@dataclass
+class Limits:
+    """Limits of a function call. None means unlimited."""
+    timeout: float = None  # Wall clock seconds
+    max_rss: float = None  # Resident memory of the process, in MB
+    cpu_seconds: float = None  # CPU seconds used by the process during the call
+
+    def __bool__(self):
+        return any(value is not None for value in (self.timeout, self.max_rss, self.cpu_seconds))
+
+
+class LimitError(RuntimeError):
+    def __init__(self, limit: str, message: str, *args: object) -> None:
+        self.limit = limit
+        self.message = message
+        super().__init__(f"{limit}: {message}", *args)
+
+
+LIMITS_WATCH_INTERVAL = 0.05  # Seconds between two checks of the wall clock and memory limits
+
+
+def get_rss() -> int:
+    """
+    :return: The resident memory of the current process, in bytes
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * resource.getpagesize()
+    except OSError:  # Not Linux, fallback to the peak resident memory
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def run_coroutine(coroutine, timeout: float = None):
+    """
+    Run a coroutine, cancelling it if it takes more than timeout seconds.
+    :param coroutine: The coroutine of an async function
+    :param timeout: Max number of seconds
+    :return: The coroutine result
+    """
+    import asyncio  # Slow to import, only needed by async functions
+
+    async def run():
+        try:
+            return await asyncio.wait_for(coroutine, timeout)
+        except asyncio.TimeoutError:
+            raise LimitError("timeout", f"call cancelled after {timeout}s") from None
+    return asyncio.run(run())
+
+
+@contextlib.contextmanager
+def enforce_limits(limits: Limits, wall_clock: bool = True):
+    """
+    Raise a LimitError in the calling thread when a limit is exceeded.
+
+    A watcher thread checks the wall clock and the resident memory and interrupts the call
+    with SIGALRM, the CPU time is limited with RLIMIT_CPU and SIGXCPU.
+    Signals can only be handled by the main thread: elsewhere, limits are not enforced.
+
+    :param limits: The limits
+    :param wall_clock: Enforce the timeout. Async calls are cancelled by run_coroutine instead
+    """
+    if not limits:
+        yield
+        return
+    if resource is None or threading.current_thread() is not threading.main_thread():
+        log.warning(f"limits can only be enforced in the main thread of a POSIX process")
+        yield
+        return
+
+    stop = threading.Event()
+    violations = []
+
+    def on_signal(signum, frame):
+        if stop.is_set():  # The call is already over
+            return
+        if signum == signal.SIGXCPU:
+            raise LimitError("cpu-seconds", f"call used more than {limits.cpu_seconds} CPU seconds")
+        if violations:
+            raise LimitError(*violations[0])
+
+    def watch():
+        start = time.monotonic()
+        while not stop.wait(LIMITS_WATCH_INTERVAL):
+            if wall_clock and limits.timeout is not None and time.monotonic() - start > limits.timeout:
+                violations.append(("timeout", f"call exceeded {limits.timeout}s"))
+            elif limits.max_rss is not None and get_rss() > limits.max_rss * 1024 * 1024:
+                violations.append(("max-rss", f"process exceeded {limits.max_rss}MB of resident memory"))
+            if violations:
+                signal.pthread_kill(threading.main_thread().ident, signal.SIGALRM)
+                break
+
+    previous_alarm_handler = signal.signal(signal.SIGALRM, on_signal)
+    previous_cpu_limit = None
+    if limits.cpu_seconds is not None:
+        previous_xcpu_handler = signal.signal(signal.SIGXCPU, on_signal)
+        previous_cpu_limit = resource.getrlimit(resource.RLIMIT_CPU)
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        cpu_limit = math.ceil(usage.ru_utime + usage.ru_stime + limits.cpu_seconds)
+        hard_limit = previous_cpu_limit[1]
+        if hard_limit != resource.RLIM_INFINITY:
+            cpu_limit = min(cpu_limit, hard_limit)
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, hard_limit))
+
+    watcher = None
+    if (wall_clock and limits.timeout is not None) or limits.max_rss is not None:
+        watcher = threading.Thread(target=watch, name="funcli-limits", daemon=True)
+        watcher.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        if watcher is not None:
+            watcher.join()
+        if previous_cpu_limit is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, previous_cpu_limit)
+            signal.signal(signal.SIGXCPU, previous_xcpu_handler)
+        signal.signal(signal.SIGALRM, previous_alarm_handler)
+
+
+def is_stream(value) -> bool:
+    """
+    Tell if a function result has to be streamed to stdout.
+    :param value: A function result
+    :return: True for generators and async generators
+    """
+    return inspect.isgenerator(value) or inspect.isasyncgen(value)
+
+
+def stream_result(
+    result, buffer_size: int = 64 * 1024, flush_interval: float = 1.0, file=None, timeout: float = None
+) -> int:
+    """
+    Drain a generator or an async generator to stdout, one line per item.
+
+    Items are written as soon as they are produced, through a bounded buffer
+    flushed when it reaches buffer_size chars or every flush_interval seconds,
+    by a background thread while the generator is slow to produce the next item.
+    The memory used doesn't depend on the number of items.
+    If the reader closes the pipe (eg: `| head`), the generator is closed and
+    the streaming stops silently.
+
+    :param result: A generator or an async generator
+    :param buffer_size: Max number of chars kept before flushing
+    :param flush_interval: Max number of seconds between two flushes
+    :param file: Where to write. Default to sys.stdout
+    :param timeout: Max number of seconds to drain an async generator, it is cancelled after that
+    :return: The number of items written
+    """
+    if file is None:
+        file = sys.stdout
+
+    buffer = []
+    buffered_size = 0
+    last_flush = time.monotonic()
+    count = 0
+    lock = threading.Lock()  # The buffer is written by the generator and flushed by the flusher thread
+    done = threading.Event()
+    flusher_errors = []  # Raised again in the calling thread, eg: BrokenPipeError
+
+    def write(item) -> None:
+        nonlocal buffered_size, count
+        line = f"{item}\n"
+        with lock:
+            if flusher_errors:
+                raise flusher_errors[0]
+            buffer.append(line)
+            buffered_size += len(line)
+            count += 1
+            if buffered_size >= buffer_size or time.monotonic() - last_flush >= flush_interval:
+                flush()
+
+    def flush() -> None:
+        nonlocal buffered_size, last_flush
+        file.write("".join(buffer))
+        file.flush()
+        buffer.clear()
+        buffered_size = 0
+        last_flush = time.monotonic()
+
+    def flush_periodically() -> None:
+        # Flush the items produced before the generator stalls
+        while not done.wait(flush_interval):
+            with lock:
+                if buffer and time.monotonic() - last_flush >= flush_interval:
+                    try:
+                        flush()
+                    except Exception as e:
+                        flusher_errors.append(e)
+                        return
+
+    flusher = threading.Thread(target=flush_periodically, name="funcli-stream-flusher", daemon=True)
+    flusher.start()
+
+    async def drain_async() -> None:
+        try:
+            async for item in result:
+                write(item)
+        finally:
+            await result.aclose()
+
+    try:
+        if inspect.isasyncgen(result):
+            run_coroutine(drain_async(), timeout=timeout)
+        else:
+            try:
+                for item in result:
+                    write(item)
+            finally:
+                result.close()
+        done.set()
+        flusher.join()
+        with lock:
+            if flusher_errors:
+                raise flusher_errors[0]
+            flush()
+    except BrokenPipeError:
+        log.debug(f"stream stopped, pipe closed by the reader after {count} items")
+        # Python flushes stdout at exit, redirect it to devnull to avoid another BrokenPipeError
+        try:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, file.fileno())
+        except (OSError, ValueError, AttributeError):
+            pass
+    finally:
+        done.set()
+    return count
+
+
+def collect_result(result, timeout: float = None) -> list:
+    """
+    Drain a generator or an async generator into a list, for callers that need the whole result.
+    :param result: A generator or an async generator
+    :param timeout: Max number of seconds to drain an async generator, it is cancelled after that
+    :return: The items
+    """
+    if inspect.isasyncgen(result):
+        async def drain_async() -> list:
+            try:
+                return [item async for item in result]
+            finally:
+                await result.aclose()
+        return run_coroutine(drain_async(), timeout=timeout)
+    try:
+        return list(result)
+    finally:
+        result.close()
+
+
+@contextlib.contextmanager
+def open_pager():
+    """
+    Open a pager to write a long output to, when stdout is a terminal.
+    The pager command is taken from FUNCLI_PAGER, then PAGER, default to `less -FRX`.
+    An empty command disables paging.
+    :return: The file to write to: the pager input, or stdout
+    """
+    command = shlex.split(os.environ.get("FUNCLI_PAGER", os.environ.get("PAGER", "less -FRX")))
+    if not command or not sys.stdout.isatty() or shutil.which(command[0]) is None:
+        yield sys.stdout
+        return
+
+    import subprocess  # Only imported when paging
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, text=True)
+    try:
+        yield process.stdin
+    except BrokenPipeError:  # The pager was quit before the end
+        pass
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        process.wait()
+
+
+PIPELINE_SEPARATOR = "::"  # Separates the functions of a pipeline in argv. Eg: tool load --path a.csv :: clean :: save
+FILLED = object()  # Default of the args filled by a pipeline or a table when parsed, to detect they're given in argv too
+
+
+def piped(arg_name: str):
+    """
+    Designate the arg receiving the result of the previous function in a pipeline.
+    By default it's the first arg of the function.
+
+        @funcli.piped("records")
+        def save(path: str, records: list):
+            ...
+
+        tool load --path in.csv :: save --path out.csv
+
+    :param arg_name: The arg name
+    :return: A decorator
+    """
+    def decorator(function):
+        if arg_name not in inspect.signature(function).parameters:
+            raise ValueError(f"{function.__name__}() has no arg {arg_name}")
+        function.__funcli_piped__ = arg_name
+        return function
+
+    return decorator
+
+
+def vectorized(function):
+    """
+    Mark a function as vectorized: when called with --from-table, it's called once
+    with the columns as lists instead of once per row.
+
+        @funcli.vectorized
+        def total(price: float, quantity: int):
+            return sum(p * q for p, q in zip(price, quantity))
+
+        tool total --from-table orders.csv
+
+    :param function: The function
+    :return: The function itself
+    """
+    function.__funcli_vectorized__ = True
+    return function
+
+
+TABLE_OPTION_HELP = (
+    "--from-table PATH: call the function for each row of a table, its columns give the args.\n"
+    "    CSV, or Parquet and Arrow when pyarrow is installed. Empty cells use the default."
+)
+
+
+def get_type_name(a_type, log_indent: int = 0) -> str:
+    if type(a_type) == type:  # If it's a basic type like int, str, bool...
+        # Get the type name this way
+        log.debug("\t"*log_indent+f"get_type_name type {a_type.__name__} is builtin")
+        return a_type.__name__
+    else:  # If it's a more specific type like list[int]...
+        # Get the type name that way
+        log.debug("\t"*log_indent+f"get_type_name type {str(a_type)} is NOT builtin")
+        return str(a_type)
+
+
+def get_type_from_str(type_name: str) -> type:
+    try:
+        # Builtin types
+        a_type = eval(type_name)
+        log.debug(f"get_type_from_str type is builtin")
+        return a_type
+    except NameError:
+        # Custom types
+        module_nbr = type_name.count(".")
+        if module_nbr == 0:
+            # If no module specified
+            log.debug(f"get_type_from_str IMplicit module")
+            return getattr(sys.modules[__name__], type_name)
+        else:
+            # If a module is specified
+            log.debug(f"get_type_from_str EXplicit module")
+            module_name, type_name = type_name.split(sep=".")
+            return getattr(sys.modules[module_name], type_name)
+
+
+def get_arg_description(
+    arg_name, docstring, arg_delimiter_start=":param ", arg_delimiter_end=":", return_delimiter=":return:"
+):
+    """
+    Parse docstring to extract arg_name's description.
+    :param arg_name: An arg name
+    :param docstring: A docstring describing multiple args
+    :param arg_delimiter_start: The delimiter for start of arg
+    :param arg_delimiter_end: The delimiter for end of arg
+    :param return_delimiter: The return delimiter
+    :return: The arg description
+    """
+    if docstring is None or docstring == "":
+        return ""
+
+    tag = f"{arg_delimiter_start}{arg_name}{arg_delimiter_end}"
+    arg_found = False
+    description = ""
+    for line in docstring.splitlines():
+        if tag in line:
+            arg_found = True
+            line = line.replace(tag, "").strip()
+            description += line + os.linesep
+        elif arg_found and arg_delimiter_start not in line and return_delimiter not in line:
+            line = line.strip()
+            description += line + os.linesep
+        elif arg_found and arg_delimiter_start in line:
+            arg_found = False
+            break
+        else:
+            pass
+    return description.strip()
+
+def extract_description_from_docstring(docstring):
+    description = ""
+    for line in docstring.splitlines():
+        line = line.strip()  # Strip line
+        # If end of description is detected
+        if line.startswith(":param ") or line.startswith(":return:"):
+            break  # Break
+        else:  # If still in description
+            description += line + os.linesep
+    return description.strip()
+
+
+INLINE_DOCS_VERSION = 1  # Invalidate the inline docs cached on disk when the extraction changes
+inline_docs_cache: dict[tuple: dict] = {}  # Inline docs of the source files already read, by (path, mtime, size)
+
+
+def extract_inline_docs(source: str) -> dict:
+    """
+    Extract the comments of the args of every function defined in a module source, in one pass.
+
+        def say_hello(
+            name: str = "world",  # The name of the guy to say hello to
+            # Eg: "john"
+            age: int = 0,  # The age of the guy
+        ):
+
+    The comments of an arg are the one ending its line and the comment lines before the next arg.
+
+    :param source: The source code of a module
+    :return: {function qualname: {arg name: description}}
+    """
+    tree = ast.parse(source)
+    tokens = list(tokenize.generate_tokens(io.StringIO(source).readline))
+    # Index of the first token of each line, to start scanning a signature from its def
+    line_starts = {}
+    for index, token in enumerate(tokens):
+        line_starts.setdefault(token.start[0], index)
+
+    docs = {}
+
+    def visit(node, prefix: str):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                visit(child, f"{prefix}{child.name}.")
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                qualname = f"{prefix}{child.name}"
+                function_docs = extract_function_inline_docs(child)
+                if function_docs:
+                    docs[qualname] = function_docs
+                visit(child, f"{qualname}.<locals>.")
+            else:
+                visit(child, prefix)
+
+    def extract_function_inline_docs(node) -> dict:
+        arguments = node.args
+        args = [*arguments.posonlyargs, *arguments.args, *arguments.kwonlyargs]
+        if not args:
+            return {}
+        args.sort(key=lambda arg: (arg.lineno, arg.col_offset))
+
+        # Collect the comments between the parenthesis of the signature
+        comments = []
+        depth = 0
+        for token in tokens[line_starts[node.lineno]:]:
+            if token.type == tokenize.OP and token.string in "([{":
+                depth += 1
+            elif token.type == tokenize.OP and token.string in ")]}":
+                depth -= 1
+                if depth == 0:
+                    break
+            elif token.type == tokenize.COMMENT and depth > 0:
+                comments.append((token.start[0], token.string.lstrip("#").strip()))
+
+        function_docs = {}
+        for index, arg in enumerate(args):
+            next_line = args[index + 1].lineno if index + 1 < len(args) else float("inf")
+            lines = [comment for line, comment in comments if arg.lineno <= line < next_line]
+            if lines:
+                function_docs[arg.arg] = os.linesep.join(lines).strip()
+        return function_docs
+
+    visit(tree, "")
+    return docs
+
+
+def get_module_inline_docs(path: str) -> dict:
+    """
+    Get the inline docs of every function of a source file.
+    Each file is read once per process while it doesn't change, and parsed once: the result is
+    cached on disk by file hash.
+    :param path: A python source file
+    :return: {function qualname: {arg name: description}}
+    """
+    stat = os.stat(path)
+    memory_key = (path, stat.st_mtime_ns, stat.st_size)
+    if memory_key in inline_docs_cache:
+        return inline_docs_cache[memory_key]
+
+    with open(path, "rb") as file:
+        source = file.read()
+    file_hash = hashlib.sha256(source).hexdigest()
+
+    cache_path = os.path.join(get_cache_dir(), "inline_docs", f"{file_hash}.{INLINE_DOCS_VERSION}.json")
+    try:
+        with open(cache_path) as file:
+            docs = json.load(file)
+        log.debug(f"inline docs of {path} loaded from {cache_path}")
+    except (OSError, ValueError):
+        docs = extract_inline_docs(source.decode("utf-8"))
+        log.debug(f"inline docs of {path} extracted")
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as file:
+                json.dump(docs, file)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            log.debug(f"inline docs can't be cached: {e}")
+
+    inline_docs_cache[memory_key] = docs
+    return docs
+
+
+def get_inline_docs(function) -> dict:
+    """
+    Get the descriptions of the args of a function from the comments of its signature.
+    :param function: A function
+    :return: {arg name: description}
+    """
+    try:
+        path = inspect.getsourcefile(function)
+    except TypeError:  # Builtins
+        return {}
+    if path is None or not os.path.isfile(path):
+        return {}
+    try:
+        module_docs = get_module_inline_docs(path)
+    except (SyntaxError, UnicodeDecodeError, tokenize.TokenError) as e:
+        log.debug(f"inline docs of {path} can't be extracted: {e}")
+        return {}
+    return module_docs.get(function.__qualname__, {})
+
+
+class DocIndex:
+    """
+    The descriptions of the functions of a CLI and of their args, with references resolved.
+
+    A description line can reference another description to reuse it:
+    - ref=fun1.__doc__ is replaced by the description of fun1
+    - ref=fun1.param1 is replaced by the description of the arg param1 of fun1
+    fun1 is a function of the CLI or a function of the module of the referencing function.
+
+    Each description is parsed and resolved once, so rendering the help of wrapper chains
+    costs as much as their number of descriptions. When a function is replaced, forget drops
+    its descriptions and the descriptions referencing them, the others are kept.
+    """
+
+    REF_TAG = "ref="
+
+    def __init__(self, functions: dict):
+        """
+        :param functions: The functions of the CLI, by name
+        """
+        self.functions = functions
+        self.descriptions = {}  # Resolved descriptions, by function then arg name or __doc__
+        self.dependents = {}  # Functions whose descriptions reference a function, by referenced function
+
+    def get_description(self, function) -> str:
+        """
+        :param function: A function
+        :return: The description of the function
+        """
+        return self.resolve(function, "__doc__")
+
+    def get_arg_description(self, function, arg_name: str) -> str:
+        """
+        :param function: A function
+        :param arg_name: The name of one of its args
+        :return: The description of the arg
+        """
+        return self.resolve(function, arg_name)
+
+    def get_raw_description(self, function, name: str) -> str:
+        if name == "__doc__":
+            if function.__doc__ is None:
+                return ""
+            return extract_description_from_docstring(function.__doc__)
+        description = get_arg_description(name, function.__doc__)
+        if description == "":  # Fallback to the comments of the arg in the function signature
+            description = get_inline_docs(function).get(name, "")
+        return description
+
+    def find_function(self, name: str, context):
+        """
+        :param name: The name of a referenced function
+        :param context: The referencing function
+        :return: The function, or None if not found
+        """
+        if name in self.functions:
+            return self.functions[name]
+        function = getattr(context, "__globals__", {}).get(name)
+        if callable(function):
+            return function
+        return None
+
+    def forget(self, function) -> set:
+        """
+        Drop the resolved descriptions of a function, and of the functions referencing them.
+        :param function: A replaced or removed function
+        :return: The functions whose descriptions were dropped
+        """
+        forgotten = set()
+        pending = [function]
+        while pending:
+            function = pending.pop()
+            if function in forgotten:
+                continue
+            forgotten.add(function)
+            self.descriptions.pop(function, None)
+            pending += self.dependents.pop(function, ())
+        return forgotten
+
+    def resolve(self, function, name: str, resolving: frozenset = frozenset()) -> str:
+        """
+        :param function: A function
+        :param name: The name of one of its args, or __doc__
+        :param resolving: The descriptions being resolved by this call, to detect cycles.
+                Kept per call and not in the index, so threads can resolve descriptions together
+        :return: The description, with references resolved
+        """
+        key = (function, name)
+        descriptions = self.descriptions.get(function, {})
+        if name in descriptions:
+            return descriptions[name]
+        if key in resolving:
+            raise RecursionError(f"cyclic reference to {function.__qualname__}.{name}")
+
+        resolving = resolving | {key}
+        lines = []
+        for line in self.get_raw_description(function, name).splitlines():
+            if not line.strip().startswith(self.REF_TAG):
+                lines.append(line)
+                continue
+
+            ref = line.strip()[len(self.REF_TAG):].strip()
+            ref_function_name, _, ref_name = ref.partition(".")
+            ref_function = self.find_function(ref_function_name, function)
+            if ref_function is None or ref_name == "":
+                log.warning(f"{function.__qualname__}.{name}: unknown reference '{ref}'")
+                lines.append(line)
+                continue
+            self.dependents.setdefault(ref_function, set()).add(function)
+            try:
+                ref_description = self.resolve(ref_function, ref_name, resolving)
+            except RecursionError as e:
+                log.warning(f"{function.__qualname__}.{name}: {e}")
+                lines.append(line)
+                continue
+            if ref_description != "":
+                lines.append(ref_description)
+        description = os.linesep.join(lines).strip()
+
+        self.descriptions.setdefault(function, {})[name] = description
+        return description
+
+
+def server_address(value: str) -> tuple:
+    """
+    Convert a [HOST]:PORT arg to a server address.
+    :param value: The arg. Eg: ":8080", "0.0.0.0:8080"
+    :return: (host, port), the host defaults to localhost
+    """
+    host, separator, port = value.rpartition(":")
+    if not separator or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"invalid address, expected [HOST]:PORT: '{value}'")
+    return host or "127.0.0.1", int(port)
+
+
+JSONRPC_PARSE_ERROR = -32700
+JSONRPC_INVALID_REQUEST = -32600
+JSONRPC_METHOD_NOT_FOUND = -32601
+JSONRPC_INVALID_PARAMS = -32602
+JSONRPC_INTERNAL_ERROR = -32603
+JSONRPC_LIMIT_ERROR = -32000  # Implementation defined server error
+JSONRPC_HTTP_STATUS = {
+    JSONRPC_PARSE_ERROR: 400,
+    JSONRPC_INVALID_REQUEST: 400,
+    JSONRPC_METHOD_NOT_FOUND: 404,
+    JSONRPC_INVALID_PARAMS: 400,
+}
+
+
+class RequestHandler:
+    """
+    Serve the functions of server.cli, see Cli.make_server.
+    It's mixed with http.server.BaseHTTPRequestHandler there, so http.server is only imported to serve.
+
+    - POST /<function> with the args as a JSON object, answered with {"result": ...}
+    - POST / with a JSON-RPC 2.0 request or batch, the method being the function
+      and the params the args, by name or by position
+    - GET / with the schema of the CLI
+
+    Args are converted and validated by the parser of the function, like argv.
+    Errors are answered with {"error": {"code": ..., "message": ...}}, using the JSON-RPC codes.
+    Connections are kept alive between requests.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        log.debug(f"{self.address_string()} {format % args}")
+
+    def send_json(self, status: int, body):
+        data = b"" if body is None else json.dumps(body, default=to_json).encode()
+        self.send_response(status)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/":
+            self.send_json(404, {"error": {"code": JSONRPC_METHOD_NOT_FOUND, "message": "not found"}})
+            return
+        self.send_json(200, self.server.cli.to_schema())
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            request = json.loads(body) if body else {}
+        except ValueError as e:
+            self.send_json(400, {"error": {"code": JSONRPC_PARSE_ERROR, "message": f"invalid JSON: {e}"}})
+            return
+
+        function_name = self.path.strip("/")
+        if function_name:
+            if not isinstance(request, dict):
+                response = {"error": {"code": JSONRPC_INVALID_PARAMS, "message": "args must be a JSON object"}}
+            else:
+                response = self.call(function_name, request)
+            status = JSONRPC_HTTP_STATUS.get(response["error"]["code"], 500) if "error" in response else 200
+            self.send_json(status, response)
+        elif isinstance(request, list):  # Batch, notifications are not answered
+            responses = [response for response in map(self.call_jsonrpc, request) if response is not None]
+            self.send_json(200 if responses else 204, responses or None)
+        else:
+            response = self.call_jsonrpc(request)
+            self.send_json(200 if response is not None else 204, response)
+
+    def call_jsonrpc(self, request) -> dict:
+        """
+        :param request: A JSON-RPC request
+        :return: The JSON-RPC response, None for notifications
+        """
+        if (
+            not isinstance(request, dict)
+            or request.get("jsonrpc") != "2.0"
+            or not isinstance(request.get("method"), str)
+            or not isinstance(request.get("params", {}), (dict, list))
+        ):
+            response = {"error": {"code": JSONRPC_INVALID_REQUEST, "message": "invalid request"}}
+            request_id = request.get("id") if isinstance(request, dict) else None
+            return {"jsonrpc": "2.0", **response, "id": request_id}
+
+        function_name = request["method"]
+        params = request.get("params", {})
+        subparser = self.server.cli.subparsers.choices.get(function_name)
+        if isinstance(params, list) and subparser is not None:  # By position, in the signature order
+            names = [action.dest for action in subparser._actions if action.dest != "help"]
+            if len(params) > len(names):
+                params = None
+            else:
+                params = dict(zip(names, params))
+        if params is None:
+            response = {"error": {"code": JSONRPC_INVALID_PARAMS, "message": "too many params"}}
         else:
-            parsed_args["subcommand"] = default_function_name
-    function_name = parsed_args["subcommand"]
-    function = functions[function_name]
-    # Clean parsed_args for further processing by the function
-    del parsed_args["subcommand"]
-    log.debug(f"    {function_name=}")
+            response = self.call(function_name, params)
+        if "id" not in request:
+            return None
+        return {"jsonrpc": "2.0", **response, "id": request["id"]}
+
+    def call(self, function_name: str, params: dict) -> dict:
+        """
+        :param function_name: The subcommand name
+        :param params: The args by name
+        :return: {"result": ...} or {"error": {"code": ..., "message": ...}}
+        """
+        if function_name not in self.server.cli.subparsers.choices:
+            return {"error": {"code": JSONRPC_METHOD_NOT_FOUND, "message": f"unknown function: {function_name}"}}
+        try:
+            result = self.server.cli.call_json(
+                function_name, dict(params), no_cache=self.server.no_cache, limits=self.server.limits
+            )
+            return {"result": result}
+        except (ArgumentParseError, ArgError) as e:
+            return {"error": {"code": JSONRPC_INVALID_PARAMS, "message": str(e)}}
+        except LimitError as e:
+            return {"error": {"code": JSONRPC_LIMIT_ERROR, "message": str(e)}}
+        except Exception as e:
+            log.exception(f"{function_name} failed")
+            return {"error": {"code": JSONRPC_INTERNAL_ERROR, "message": f"{type(e).__name__}: {e}"}}
+
+
+"""
+def print_help_and_exit(exception: Exception, parser: argparse.ArgumentParser):
+    print(f"ERROR: {exception.__str__()}")
+    print()
+    parser.print_help()
+    print()
+    print(f"ERROR: {exception.__str__()}")
+    print()
+    sys.exit(1)
+"""
+
+class Cli:
+    """
+    A CLI built from functions.
+
+    Building the parser and the definitions is done once, the CLI can then be run
+    with as many argv as needed. fun_to_cli builds a Cli and runs it with sys.argv.
+
+    Many threads can parse and call with the same Cli without locks: the parse state is kept
+    per call, the definitions are read only and the caches filled on first use keep the first
+    value built. register and unregister change the Cli and must not run while it's used.
+    """
+
+    def __init__(
+        self,
+        functions,
+        default_function_name: str = "",
+        exit_on_error=True,
+        stream_buffer_size: int = 64 * 1024,
+        stream_flush_interval: float = 1.0,
+        prog: str = None,
+        module=None,
+        limits: Limits = None,
+        limit_options: bool = False,
+        serve_option: bool = False,
+        journal: Journal = None,
+        table_option: bool = False,
+    ):
+        """
+        Build the arg parser of every function.
+        :param functions: A list of functions. Eg: [print, json.dumps, ]
+        :param default_function_name: The name of the default function if no subcommand is called in CLI
+                It can only be a function that takes no required args
+        :param exit_on_error: Force parser to exit script if error happen in parsing args
+        :param stream_buffer_size: When a function returns a generator, its items are streamed to stdout
+                through a buffer flushed every stream_buffer_size chars...
+        :param stream_flush_interval: ... or every stream_flush_interval seconds
+        :param prog: The program name displayed in usage. Default to the script name
+        :param module: The module holding __app_name__, __version__, __author__ and __doc__. Default to __main__
+        :param limits: The default limits of every call
+        :param limit_options: Add the --timeout, --max-rss and --cpu-seconds options to override limits
+        :param serve_option: Add the --serve option to serve the functions over HTTP and JSON-RPC, see Cli.serve
+        :param journal: Record every call in this journal, and add the --replay option to run a recorded call again
+        :param table_option: Accept --from-table PATH after a subcommand, to call it for each row of a table
+        """
+        self.default_function_name = default_function_name
+        self.exit_on_error = exit_on_error
+        self.stream_buffer_size = stream_buffer_size
+        self.stream_flush_interval = stream_flush_interval
+        self.limits = limits if limits is not None else Limits()
+        self.limit_options = limit_options
+        self.serve_option = serve_option
+        self.journal = journal
+        self.table_option = table_option
+
+        # Parse args definitions
+        log.debug(f"Parsing definitions...")
+        log.debug(f"----------------------")
+        
+        # reorganise functions in a dict
+        self.functions = {func.__name__: func for func in functions}
+        self.definitions: dict[str: Function] = {}
+        self.doc_index = DocIndex(self.functions)
+        self.partial_parsers: dict[tuple: ArgumentParser] = {}  # Built on first use, see get_partial_parser
+
+        # Get script details
+        if module is None:
+            module = sys.modules["__main__"]
+        
+        module_name = getattr(module, "__app_name__", "Anonymous script")
+        if module_name == "__main__":
+            module_name = "Anonymous script"
+        log.debug(f"{module_name=}")
+        
+        module_version_info = ("0", "0", "0")
+        module_version = getattr(module, "__version__", ".".join(module_version_info))
+        log.debug(f"{module_version=}")
+        
+        module_author = getattr(module, "__author__", "Anonymous author")
+        log.debug(f"{module_author=}")
+        
+        self.module_version_repr = f"{module_name} version:{module_version} by {module_author}"
+        log.debug(f"{self.module_version_repr=}")
+        
+        module_doc = getattr(module, "__doc__", None)
+        if module_doc is None:
+            module_doc = ""
+        module_doc = self.module_version_repr + os.linesep + module_doc
+        log.debug(f"{module_doc=}")
+        self.module_doc = module_doc
+
+        # Init arg parser
+        self.parser = ArgumentParser(
+            prog=prog, description=module_doc, exit_on_error=exit_on_error, formatter_class=argparse.RawTextHelpFormatter
+        )
+        self.subparsers = self.parser.add_subparsers(dest="subcommand")
+
+        # For each function
+        for function_name, function in self.functions.items():
+            self.add_function(function_name, function)
+        global definitions
+        definitions = {**definitions, **self.definitions}  # Replaced once, not per function
+
+        self.add_root_options(cacheable=any(hasattr(function, "__funcli_cache__") for function in self.functions.values()))
+
+    def add_root_options(self, cacheable: bool):
+        """
+        Add the options that are not related to a function.
+        :param cacheable: If some functions are cacheable
+        """
+        # Add a full help option
+        self.parser.add_argument(f"--full-help", action="store_true", default=False, help="show help for every subcommands")
+
+        # Add a version option
+        #parser.add_argument("--version", action="version", version=module_version_repr)
+        self.parser.add_argument(f"--version", action="store_true", default=False, help="show version")
+
+        # Add an option to render the help for tools, hidden from the usage and the help
+        self.parser.add_argument(f"--help-format", choices=HELP_FORMATS, default="text", help=argparse.SUPPRESS)
+
+        # Add an option to bypass the result cache, only if some functions are cacheable
+        if cacheable:
+            self.add_cache_option()
+
+        # Add options to limit the call
+        if self.limit_options:
+            self.parser.add_argument(f"--timeout", type=float, default=None, help="max wall clock seconds of the call")
+            self.parser.add_argument(f"--max-rss", type=float, default=None, help="max resident memory of the process, in MB")
+            self.parser.add_argument(f"--cpu-seconds", type=float, default=None, help="max CPU seconds of the call")
+
+        # Add an option to run a call recorded in the journal again
+        if self.journal is not None:
+            self.parser.add_argument(f"--replay", type=int, default=None, metavar="ID", help="run a recorded call again")
+
+        # Add an option to serve the functions instead of calling one
+        if self.serve_option:
+            self.parser.add_argument(
+                f"--serve",
+                type=server_address,
+                default=None,
+                metavar="[HOST]:PORT",
+                help="serve the functions over HTTP and JSON-RPC, on localhost by default",
+            )
+
+    def add_cache_option(self):
+        """
+        Add the --no-cache option, if not added yet.
+        """
+        if "--no-cache" not in self.parser._option_string_actions:
+            self.parser.add_argument(f"--no-cache", action="store_true", default=False, help="don't use cached results")
+
+    def add_function(self, function_name: str, function):
+        """
+        Build the definition and the subparser of a function.
+        :param function_name: The subcommand name
+        :param function: The function
+        """
+        log.debug(f"{function_name=}")
+        
+        # Create a parser for each function
+        # Tag default function in help
+        if function_name == self.default_function_name:
+            function_help = f"[default if no subcommand provided]" + os.linesep
+            log.debug(f"    DEFAULT if no subcommand provided")
+            
+        # Use docstring as help
+        descr = self.doc_index.get_description(function)
+        
+        subparser = self.subparsers.add_parser(
+            name=function_name,
+            help=descr,
+            description=descr,
+            epilog=TABLE_OPTION_HELP if self.table_option else None,
+            formatter_class=HelpFormatter,
+        )
+        args_group = subparser.add_argument_group("args")
+        args_group.funcli_table = None  # Built from the args when the help is first rendered
+
+        # If there are args, add them to CLI
+        args = {}
+        arg_constraints = []
+        for arg_name, parameter in inspect.signature(function).parameters.items():
+            log.debug(f"    {arg_name=}")
+            default = parameter.default
+            
+            # Detect type
+            if parameter.annotation != inspect._empty:  # Annotated
+                annotation, constraints = split_annotated(parameter.annotation)
+                arg_constraints += [(arg_name, constraint, per_item) for constraint, per_item in constraints]
+                log.debug(f"        {constraints=}")
+                original_type = annotation
+                translated_type = annotation
+                log.debug(f"        type is explicitly defined as {original_type=}")
+                
+            elif default != inspect._empty:  # Not annotated but default value
+                if default is not None and not isinstance(default, Lazy):
+                    original_type = type(default)
+                    translated_type = type(default)
+                else:
+                    original_type = None
+                    translated_type = str
+                log.debug(f"        type is implicitly defined as {original_type=}")
+                
+            else:  # Not annotated and no default value
+                original_type = None
+                translated_type = str
+                log.debug(f"        type is unknown")
+                
+            # Fix default value
+            required = False
+            if default == inspect._empty:
+                default = None
+                required = True
+            log.debug(f"        {default=}")
+            log.debug(f"        {required=}")
+            
+            arg = Arg(
+                name=arg_name,
+                required=required,
+                original_type=original_type,
+                translated_type=translated_type,
+                default=default,
+                function=function,
+                doc_index=self.doc_index,
+            )
+                
+            # Advanced type detection for list
+            if arg.is_list():
+                if arg.get_final_type() == list:  # If arg is a list of unspecified type, this is a list[str]
+                    translated_type = str
+                    log.debug(f"        type is list[unspecified] and will be considered as list[str]")
+                else:  # If list[str], list[int]...
+                    translated_type = arg.get_final_type()
+                    log.debug(f"        type is list[{arg.get_final_type()}] and will be considered as list[{arg.get_final_type()}]")
+            
+            # Advanced type detection for Enums
+            if arg.is_enum():
+                translated_type = str
+                log.debug(f"        type is Enum({arg.get_final_type()})")
+            
+            # Advanced type detection for files
+            if arg.is_file():
+                translated_type = existing_file
+                log.debug(f"        type is a file opened as {arg.get_final_type()}")
+            
+            arg = dataclasses.replace(arg, translated_type=translated_type)
+            args[arg.name] = arg
+            
+            if log.isEnabledFor(logging.DEBUG):  # Don't render the help if it's not logged
+                arg.print(log_indent=1)
+            
+            action = args_group.add_argument(
+                f"--{arg.name}",
+                action=arg.get_action(log_indent=1),
+                default=arg.default,
+                type=arg.translated_type,
+                choices=arg.get_choices(log_indent=1),
+                required=arg.required,
+                help=ARG_HELP_PLACEHOLDER,
+            )
+            action.funcli_arg = arg  # The help is rendered from the arg by HelpTable or HelpFormatter
+        
+        validator = Validator(arg_constraints, getattr(function, "__funcli_constraints__", []))
+        fun = Function(name=function_name, fun=function, descr=descr, args=types.MappingProxyType(args), validator=validator)
+        self.definitions[fun.name] = fun
 
-    
-    # Clean args
-    parsed_args_tmp: dict = {}
-    # Search for list type args
-    for key, value in parsed_args.items():
-        fun: Function = definitions[function_name]
-        arg: Arg = fun.args[key]
-        log.debug(f"parsing call for arg {arg.name}({arg.original_type}) = {value}")
+    def register(self, function, name: str = None):
+        """
+        Add a function, or replace the function registered with the same name (eg: after reloading its module).
+        Only the definition and the subparser of this function are built, and only the help of the
+        functions whose descriptions reference it is rendered again: registering a function costs the
+        same whatever the number of functions of the CLI. A replaced function is listed last in the help.
+        :param function: The function
+        :param name: The subcommand name. Default to the function name
+        """
+        if name is None:
+            name = function.__name__
+        dependents = self.remove_function(name) if name in self.functions else []
+        self.functions[name] = function
+        self.add_function(name, function)
+        global definitions
+        definitions = {**definitions, name: self.definitions[name]}
+        if hasattr(function, "__funcli_cache__"):
+            self.add_cache_option()
+        for dependent in dependents:
+            self.refresh_help(dependent)
+        self.parser.help_cache.clear()  # The root help lists the subcommands
+
+    def unregister(self, name: str):
+        """
+        Remove a function, see register.
+        :param name: The subcommand name
+        """
+        if name not in self.functions:
+            raise KeyError(f"no function {name!r}")
+        for dependent in self.remove_function(name):
+            self.refresh_help(dependent)
+        self.parser.help_cache.clear()
+
+    def remove_function(self, function_name: str) -> list:
+        """
+        Remove the definition, the subparser and the cached descriptions of a function.
+        :param function_name: The subcommand name
+        :return: The names of the functions whose descriptions referenced it
+        """
+        function = self.functions.pop(function_name)
+        fun = self.definitions.pop(function_name)
+        global definitions
+        if definitions.get(function_name) is fun:
+            definitions = {name: other for name, other in definitions.items() if name != function_name}
+
+        del self.subparsers._name_parser_map[function_name]
+        self.subparsers._choices_actions[:] = [
+            action for action in self.subparsers._choices_actions if action.dest != function_name
+        ]
+        self.forget_partial_parsers(function_name)
+
+        forgotten = self.doc_index.forget(function)
+        return [name for name, other in self.functions.items() if other in forgotten]
+
+    def forget_partial_parsers(self, function_name: str):
+        """
+        Drop the partial parsers of a function, see get_partial_parser.
+        :param function_name: The subcommand name
+        """
+        for key in [key for key in self.partial_parsers if key[0] == function_name]:
+            del self.partial_parsers[key]
+
+    def refresh_help(self, function_name: str):
+        """
+        Render the help of a function again, after a function referenced by its descriptions changed.
+        :param function_name: The subcommand name
+        """
+        fun = self.definitions[function_name]
+        descr = self.doc_index.get_description(fun.fun)
+        subparser = self.subparsers.choices[function_name]
+        subparser.description = descr
+        for action in self.subparsers._choices_actions:
+            if action.dest == function_name:
+                action.help = descr
+        for group in subparser._action_groups:
+            if hasattr(group, "funcli_table"):
+                group.funcli_table = None
+        subparser.help_cache.clear()
+        self.forget_partial_parsers(function_name)
+
+        refreshed = dataclasses.replace(fun, descr=descr)
+        self.definitions[function_name] = refreshed
+        global definitions
+        if definitions.get(function_name) is fun:
+            definitions = {**definitions, function_name: refreshed}
+
+    def parse(self, argv: list) -> dict:
+        """
+        Parse argv, injecting the default function name if no subcommand is provided.
+        :param argv: The args, without the script name
+        :return: The parsed args, including the root options
+        """
+        log.debug(f"")
+        log.debug(f"")
+        log.debug(f"Parsing call...")
+        log.debug(f"---------------")
         
+        # Skip the root options given before the subcommand (eg: --no-cache)
+        root_options = {option: action for action in self.parser._actions for option in action.option_strings}
+        subcommand_index = 0
+        requested_help_format = "text"
+        while subcommand_index < len(argv) and argv[subcommand_index].split("=", 1)[0] in root_options:
+            option, equals, value = argv[subcommand_index].partition("=")  # --option=value or --option value
+            if root_options[option].nargs != 0 and not equals:  # Skip the option value
+                subcommand_index += 1
+                value = argv[subcommand_index] if subcommand_index < len(argv) else ""
+            if option == "--help-format":
+                requested_help_format = value
+            subcommand_index += 1
+
+        # Extract options as a dict
+        with set_context(help_format, requested_help_format):  # The help is printed while parsing
+            if (
+                self.table_option
+                and subcommand_index < len(argv)
+                and argv[subcommand_index] in self.functions
+                and any(token.split("=")[0] == "--from-table" for token in argv[subcommand_index + 1:])
+            ):
+                log.debug(f"    table provided")
+                parsed_args = self.parse_table(argv, subcommand_index)
+            elif subcommand_index < len(argv) and argv[subcommand_index] in self.functions:
+                # If subcommand provided
+                log.debug(f"    subcommand provided")
+                parsed_args = vars(self.parser.parse_args(argv))
+            else:
+                # Else, if subcommand was NOT provided
+                log.debug(f"    subcommand NOT provided")
+
+                # If a specific flag is found, revert to default
+                specific_flag_found = False
+                options = [token.split("=", 1)[0] for token in argv]
+                for flag in ["-h", "--help", "--full-help", "--version", "--serve", "--replay"]:
+                    if flag in options:
+                        log.debug(f"    specific_flag_found=True")
+                        parsed_args = vars(self.parser.parse_args(argv))
+                        specific_flag_found = True
+                        break
+
+                # If a specific flag is NOT found, inject default_function_name into argv
+                if not specific_flag_found:
+                    argv = argv[:subcommand_index] + [self.default_function_name] + argv[subcommand_index:]
+                    parsed_args = vars(self.parser.parse_args(argv))
+        log.debug(f"    {parsed_args=}")
+        return parsed_args
+
+    def get_piped_arg(self, function_name: str) -> str:
+        """
+        :param function_name: The subcommand name
+        :return: The arg receiving the result of the previous function in a pipeline, see piped.
+                None if the function has no args
+        """
+        fun: Function = self.definitions[function_name]
+        return getattr(fun.fun, "__funcli_piped__", next(iter(fun.args), None))
+
+    def get_partial_parser(self, function_name: str, filled_args: tuple) -> ArgumentParser:
+        """
+        Get a parser of a function whose args are partly filled by something else than argv:
+        a pipeline (see parse_stage) or a table (see parse_table).
+        It's its subparser, except that the filled args are not required and can't be given.
+        :param function_name: The subcommand name
+        :param filled_args: The names of the filled args
+        :return: The parser
+        """
+        key = (function_name, tuple(filled_args))
+        if key not in self.partial_parsers:
+            subparser = self.subparsers.choices[function_name]
+            parser = ArgumentParser(
+                prog=subparser.prog,
+                description=subparser.description,
+                exit_on_error=self.exit_on_error,
+                formatter_class=subparser.formatter_class,
+            )
+            for action in subparser._actions:
+                if action.dest == "help":  # The parser has its own
+                    continue
+                if action.dest in filled_args:
+                    action = copy.copy(action)
+                    action.required = False
+                    action.default = FILLED
+                parser._add_action(action)
+            return self.partial_parsers.setdefault(key, parser)  # Threads building it together keep the first
+        return self.partial_parsers[key]
+
+    def parse_table(self, argv: list, subcommand_index: int) -> dict:
+        """
+        Parse argv of a function called with --from-table: the args given by the columns
+        of the table are not required, and can't be given in argv too.
+        :param argv: The args, without the script name
+        :param subcommand_index: The index of the subcommand in argv
+        :return: The parsed args, including the root options, and the columns as from_table
+        """
+        function_name = argv[subcommand_index]
+        subparser = self.subparsers.choices[function_name]
+        function_argv = []
+        path = None
+        tokens = iter(argv[subcommand_index + 1:])
+        for token in tokens:
+            if token == "--from-table":
+                path = next(tokens, None)
+            elif token.startswith("--from-table="):
+                path = token.split("=", 1)[1]
+            else:
+                function_argv.append(token)
+        if path is None:
+            subparser.error(f"argument --from-table: expected one argument")
+        try:
+            columns = read_table(path)
+        except (OSError, UnicodeDecodeError, ArgumentParseError) as e:
+            subparser.error(f"argument --from-table: {e}")
+        arg_names = [action.dest for action in subparser._actions if action.dest != "help"]
+        unknown = [name for name in columns if name not in arg_names]
+        if unknown:
+            subparser.error(f"argument --from-table: unknown columns: {', '.join(unknown)}")
+
+        parsed_args = vars(self.parser.parse_args(argv[:subcommand_index]))  # The root options
+        parser = self.get_partial_parser(function_name, tuple(columns))
+        function_args = vars(parser.parse_args(function_argv))
+        for name in columns:
+            if function_args.pop(name) is not FILLED:
+                parser.error(f"argument --{name}: given by the table, it can't be given too")
+        parsed_args.update(function_args)
+        parsed_args["subcommand"] = function_name
+        parsed_args["from_table"] = columns
+        return parsed_args
+
+    def parse_stage(self, argv: list) -> tuple:
+        """
+        Parse the argv of a function called after PIPELINE_SEPARATOR.
+        :param argv: The args, starting with the subcommand
+        :return: (function_name, cast args without the piped arg)
+        """
+        if not argv or argv[0] not in self.subparsers.choices:
+            self.parser.error(f"a subcommand is expected after {PIPELINE_SEPARATOR}, got: {' '.join(argv)}")
+        function_name = argv[0]
+        piped_arg = self.get_piped_arg(function_name)
+        if piped_arg is None:
+            self.subparsers.choices[function_name].error(f"no arg to receive the result of the previous function")
+        parser = self.get_partial_parser(function_name, (piped_arg,))
+        parsed_args = vars(parser.parse_args(argv[1:]))
+        if parsed_args.pop(piped_arg) is not FILLED:
+            parser.error(f"argument --{piped_arg}: receives the result of the previous function, it can't be given")
+        log.debug(f"    {function_name=}, {parsed_args=}")
+        return function_name, self.cast_args(function_name, parsed_args)
+
+    def cast_args(self, function_name: str, parsed_args: dict) -> dict:
+        """
+        Cast the parsed values of a function args to the annotated types.
+        :param function_name: The subcommand name
+        :param parsed_args: The parsed args of the function
+        :return: The cast args
+        """
         def cast_value(arg, value):
+            if isinstance(value, Lazy):  # Evaluated when called, see resolve_defaults
+                return value
             if arg.is_enum():
                 if isinstance(value, enum.Enum):
                     return value
                 return arg.get_final_type().__getitem__(value)
             return value
-                
-        if arg.is_list():
-            list_tmp = []
-            for index, item in enumerate(value):
-                tmp_value = cast_value(arg, item)
-                log.debug(f"\t{index=}, {item=}, {tmp_value=}")
-                list_tmp.append(tmp_value)
-            value = list_tmp
+
+        fun: Function = self.definitions[function_name]
+        parsed_args_tmp: dict = {}
+        # Search for list type args
+        for key, value in parsed_args.items():
+            arg: Arg = fun.args[key]
+            log.debug(f"parsing call for arg {arg.name}({arg.original_type}) = {value}")
+                    
+            if arg.is_list() and not isinstance(value, Lazy):
+                list_tmp = []
+                for index, item in enumerate(value):
+                    tmp_value = cast_value(arg, item)
+                    log.debug(f"\t{index=}, {item=}, {tmp_value=}")
+                    list_tmp.append(tmp_value)
+                value = list_tmp
+            else:
+                value = cast_value(arg, value)
+            
+            parsed_args_tmp[key] = value
+        return parsed_args_tmp
+
+    def call(
+        self, function_name: str, parsed_args: dict, no_cache: bool = False, limits: Limits = None, stream: bool = True
+    ):
+        """
+        Call a function with its cast args.
+        Cacheable functions results are taken from the cache, async functions are run,
+        generators are streamed to stdout.
+        :param function_name: The subcommand name
+        :param parsed_args: The cast args
+        :param no_cache: Don't use the cache
+        :param limits: The limits of the call, a LimitError is raised when exceeded. Default to the Cli limits
+        :param stream: Stream generators to stdout, else collect their items into a list
+        :return: The function result, or the number of streamed items
+        """
+        return self.call_pipeline([(function_name, parsed_args)], no_cache=no_cache, limits=limits, stream=stream)
+
+    def call_pipeline(self, stages: list, no_cache: bool = False, limits: Limits = None, stream: bool = True):
+        """
+        Call functions in a row, in the same process: the result of each function is passed as is
+        to the piped arg of the next one (see piped). Generators are consumed lazily by the next
+        function, nothing is copied. The result of the last function is handled like in call.
+        Only the first function can be taken from the cache, the others depend on piped values.
+        :param stages: The functions to call, as (function_name, cast args without the piped arg)
+        :param no_cache: Don't use the cache
+        :param limits: The limits of the whole pipeline. Default to the Cli limits
+        :param stream: Stream a generator returned by the last function to stdout, else collect its items into a list
+        :return: The last function result, or the number of streamed items
+        """
+        log.debug(f"")
+        log.debug(f"")
+        log.debug(f"Calling function...")
+        log.debug(f"---------------")
+        if limits is None:
+            limits = self.limits
+        # Check the args of every function before calling any
+        stages = [(function_name, self.resolve_defaults(function_name, parsed_args)) for function_name, parsed_args in stages]
+        for function_name, parsed_args in stages:
+            validator = self.definitions[function_name].validator
+            if validator:
+                validator(parsed_args)
+        is_async = any(
+            inspect.iscoroutinefunction(function) or inspect.isasyncgenfunction(function)
+            for function in (self.definitions[function_name].fun for function_name, _ in stages)
+        )
+        with contextlib.ExitStack() as stack:  # Files opened for the calls are closed when leaving
+            stack.enter_context(enforce_limits(limits, wall_clock=not is_async))
+            function_result = None
+            for index, (function_name, parsed_args) in enumerate(stages):
+                piped_args = {self.get_piped_arg(function_name): function_result} if index > 0 else {}
+                function_result = self.invoke(
+                    function_name, parsed_args, stack, limits, no_cache=no_cache or index > 0, piped_args=piped_args
+                )
+
+            if is_stream(function_result) and not stream:
+                function_result = collect_result(function_result, timeout=limits.timeout)
+            elif is_stream(function_result):
+                function_result = stream_result(
+                    function_result,
+                    buffer_size=self.stream_buffer_size,
+                    flush_interval=self.stream_flush_interval,
+                    timeout=limits.timeout,
+                )
+        return function_result
+
+    def convert_columns(self, function_name: str, columns: dict) -> dict:
+        """
+        Convert the columns of a table to the types of the args, a whole column at once
+        with the converters of the parser. Empty cells are replaced by the default of the arg.
+        :param function_name: The subcommand name
+        :param columns: The columns by arg name. Cells read as str are converted, others are kept
+        :return: The converted columns
+        """
+        fun: Function = self.definitions[function_name]
+        converted = {}
+        for name, column in columns.items():
+            arg: Arg = fun.args[name]
+            if arg.is_list():
+                raise ArgError(name, f"list args can't be read from a table")
+            if arg.translated_type is bool:
+                convert = to_bool
+            else:
+                convert = arg.translated_type  # The converter of the parser
+            if arg.is_enum():
+                enum_type = arg.get_final_type()
+                convert = lambda value, enum_type=enum_type: enum_type[value]
+
+            def convert_cell(value):
+                if value is None or value == "":
+                    if arg.required:
+                        raise ValueError(f"required")
+                    return arg.default
+                return convert(value) if isinstance(value, str) else value
+
+            try:
+                converted[name] = list(map(convert_cell, column))
+            except (TypeError, ValueError, KeyError, argparse.ArgumentTypeError):
+                for index, value in enumerate(column):  # Find the first invalid cell
+                    try:
+                        convert_cell(value)
+                    except (TypeError, ValueError, KeyError, argparse.ArgumentTypeError) as e:
+                        raise ArgError(name, f"row {index + 1}: invalid value {value!r}: {e}")
+        return converted
+
+    def call_table(
+        self, function_name: str, parsed_args: dict, columns: dict, no_cache: bool = False, limits: Limits = None
+    ) -> list:
+        """
+        Call a function for each row of a table, or once with the columns if it's vectorized.
+        :param function_name: The subcommand name
+        :param parsed_args: The cast args given in argv, the same for every row
+        :param columns: The other args, as columns of the same length. See read_table
+        :param no_cache: Don't use the cache
+        :param limits: The limits of the whole table. Default to the Cli limits
+        :return: The result of each row, or the result of the vectorized function
+        """
+        if limits is None:
+            limits = self.limits
+        fun: Function = self.definitions[function_name]
+        columns = self.convert_columns(function_name, columns)
+        parsed_args = self.resolve_defaults(function_name, parsed_args)
+        row_count = len(next(iter(columns.values()), []))
+        rows = [
+            self.resolve_defaults(function_name, {**parsed_args, **{name: column[index] for name, column in columns.items()}})
+            for index in range(row_count)
+        ]
+        if fun.validator:
+            for index, row in enumerate(rows):
+                try:
+                    fun.validator(row)
+                except ArgError as e:
+                    raise ArgError(e.arg_name, f"row {index + 1}: {e.message}")
+
+        is_async = inspect.iscoroutinefunction(fun.fun) or inspect.isasyncgenfunction(fun.fun)
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(enforce_limits(limits, wall_clock=not is_async))
+            if getattr(fun.fun, "__funcli_vectorized__", False):
+                columns = {name: [row[name] for row in rows] for name in columns}  # With the lazy defaults evaluated
+                results = self.invoke(function_name, parsed_args, stack, limits, no_cache=True, piped_args=columns)
+                if is_stream(results):
+                    results = stream_result(
+                        results,
+                        buffer_size=self.stream_buffer_size,
+                        flush_interval=self.stream_flush_interval,
+                        timeout=limits.timeout,
+                    )
+                return results
+
+            results = []
+            for row in rows:
+                function_result = self.invoke(function_name, row, stack, limits, no_cache=no_cache)
+                if is_stream(function_result):
+                    function_result = stream_result(
+                        function_result,
+                        buffer_size=self.stream_buffer_size,
+                        flush_interval=self.stream_flush_interval,
+                        timeout=limits.timeout,
+                    )
+                results.append(function_result)
+        return results
+
+    def resolve_defaults(self, function_name: str, parsed_args: dict) -> dict:
+        """
+        Evaluate the Lazy defaults of the args that were not given.
+        :param function_name: The subcommand name
+        :param parsed_args: The cast args
+        :return: The cast args, without Lazy values
+        """
+        if not any(isinstance(value, Lazy) for value in parsed_args.values()):
+            return parsed_args
+        fun: Function = self.definitions[function_name]
+        parsed_args = dict(parsed_args)
+        for name, value in parsed_args.items():
+            if not isinstance(value, Lazy):
+                continue
+            arg: Arg = fun.args[name]
+            value = value()
+            log.debug(f"    lazy default {name}={value!r}")
+            try:
+                if isinstance(value, str) and not arg.is_list():  # Like argparse converts str defaults
+                    if arg.translated_type is bool:
+                        value = to_bool(value)
+                    elif arg.translated_type is not str:
+                        value = arg.translated_type(value)
+                    if arg.is_enum():
+                        value = arg.get_final_type()[value]
+            except (TypeError, ValueError, KeyError, argparse.ArgumentTypeError) as e:
+                raise ArgError(name, f"invalid default {arg.default}={value!r}: {e}")
+            parsed_args[name] = value
+        return parsed_args
+
+    def invoke(
+        self,
+        function_name: str,
+        parsed_args: dict,
+        stack: contextlib.ExitStack,
+        limits: Limits,
+        no_cache: bool = False,
+        piped_args: dict = None,
+    ):
+        """
+        Call a function and return its result as is, generators included.
+        Cacheable functions results are taken from the cache, async functions are run.
+        :param function_name: The subcommand name
+        :param parsed_args: The cast args
+        :param stack: The files opened for the call are closed with it
+        :param limits: The limits of the call, only the timeout of async functions is enforced here
+        :param no_cache: Don't use the cache
+        :param piped_args: Args passed as is, neither opened nor part of the cache key
+        :return: The function result
+        """
+        fun: Function = self.definitions[function_name]
+        function = fun.fun
+
+        def call_function():
+            # Open file args only when the function is actually called
+            call_args = dict(parsed_args)
+            for arg in fun.args.values():
+                if arg.is_file() and call_args.get(arg.name) is not None:
+                    if arg.is_list():
+                        call_args[arg.name] = [
+                            open_file(arg.get_final_type(), path, stack) for path in call_args[arg.name]
+                        ]
+                    else:
+                        call_args[arg.name] = open_file(arg.get_final_type(), call_args[arg.name], stack)
+            if piped_args:
+                call_args.update(piped_args)
+            function_result = function(**call_args)
+            if inspect.iscoroutine(function_result):
+                function_result = run_coroutine(function_result, timeout=limits.timeout)
+            return function_result
+
+        cache_options: CacheOptions = getattr(function, "__funcli_cache__", None)
+        if cache_options is not None and not no_cache and not piped_args:
+            cache_key = result_cache.make_key(
+                function, parsed_args, [arg.name for arg in fun.args.values() if arg.is_file()]
+            )
+            cache_hit, function_result = result_cache.get(cache_key)
+            log.debug(f"    {cache_hit=}")
+            if not cache_hit:
+                function_result = call_function()
+                result_cache.set(cache_key, function_result, ttl=cache_options.ttl)
         else:
-            value = cast_value(arg, value)
+            function_result = call_function()
+        return function_result
+
+    def call_json(self, function_name: str, params: dict, no_cache: bool = False, limits: Limits = None):
+        """
+        Call a function with JSON args, converted and validated by its parser like argv.
+        :param function_name: The subcommand name
+        :param params: The args by name: lists for list args, names for enums, paths for files...
+        :param no_cache: Don't use the cache
+        :param limits: The limits of the call. Default to the Cli limits
+        :return: The function result, generators are collected into a list
+        :raises KeyError: When the function is unknown
+        :raises ArgumentParseError: When the args are invalid
+        """
+        subparser = self.subparsers.choices[function_name]
+        actions = {action.dest: action for action in subparser._actions if action.dest != "help"}
+        argv = [function_name]
+        for name, value in params.items():
+            if name not in actions:
+                raise ArgumentParseError(f"unrecognized arguments: {name}")
+            action = actions[name]
+            if value is None:  # Use the default
+                continue
+            if isinstance(action, argparse.BooleanOptionalAction):
+                if not isinstance(value, bool):
+                    raise ArgumentParseError(f"argument {name}: expected a boolean, got {json.dumps(value, default=str)}")
+                argv.append(f"--{name}" if value else f"--no-{name}")
+            elif isinstance(action, CustomAppendAction):
+                for item in value if isinstance(value, list) else [value]:
+                    if not isinstance(item, (str, int, float)):
+                        raise ArgumentParseError(f"argument {name}: expected a list of values, got {json.dumps(value, default=str)}")
+                    argv.append(f"--{name}={to_json(item)}")
+            else:
+                if not isinstance(value, (str, int, float)):
+                    raise ArgumentParseError(f"argument {name}: expected a single value, got {json.dumps(value, default=str)}")
+                argv.append(f"--{name}={to_json(value)}")
+
+        with set_context(raise_parse_errors, True):
+            parsed_args = self.parse(argv)
+        parsed_args = {name: value for name, value in parsed_args.items() if name in actions}
+        parsed_args = self.cast_args(function_name, parsed_args)
+        return self.call(function_name, parsed_args, no_cache=no_cache, limits=limits, stream=False)
+
+    def make_server(
+        self, address: tuple = ("127.0.0.1", 8080), no_cache: bool = False, limits: Limits = None
+    ) -> "http.server.ThreadingHTTPServer":
+        """
+        Build an HTTP server calling the functions, see RequestHandler.
+        :param address: (host, port). Port 0 picks a free port, see server.server_address
+        :param no_cache: Don't use the cache
+        :param limits: The limits of each call. Default to the Cli limits
+        :return: The server, not started yet
+        """
+        import http.server  # Slow to import, only needed to serve
+        handler_class = type("RequestHandler", (RequestHandler, http.server.BaseHTTPRequestHandler), {})
+        server = http.server.ThreadingHTTPServer(address, handler_class)
+        server.daemon_threads = True
+        server.cli = self
+        server.no_cache = no_cache
+        server.limits = limits
+        return server
+
+    def serve(self, address: tuple = ("127.0.0.1", 8080), no_cache: bool = False, limits: Limits = None):
+        """
+        Serve the functions over HTTP and JSON-RPC until interrupted.
+        Each request is handled in its own thread. Limits other than the timeout of async
+        functions can't be enforced there, see enforce_limits.
+        :param address: (host, port)
+        :param no_cache: Don't use the cache
+        :param limits: The limits of each call. Default to the Cli limits
+        """
+        with self.make_server(address, no_cache=no_cache, limits=limits) as server:
+            host, port = server.server_address[:2]
+            print(f"Serving on http://{host}:{port}/", flush=True)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+
+    def to_schema(self) -> dict:
+        """
+        Describe the CLI with JSON serializable data: every function with its args, types, choices, defaults
+        and descriptions. See load_schema.
+        :return: The schema
+        """
+        functions = {}
+        for fun in self.definitions.values():
+            args = {}
+            for arg in fun.args.values():
+                args[arg.name] = {
+                    "type": SCHEMA_TYPES.get(arg.translated_type),  # None when converted after import
+                    "list": arg.is_list(),
+                    "choices": arg.get_choices(),
+                    "required": arg.required,
+                    "default": None if isinstance(arg.default, Lazy) else to_json(arg.default),  # Evaluated after import
+                    "description": arg.description,
+                    "help": arg.help,
+                    "type_name": arg.type_text,
+                    "default_text": arg.default_text,
+                }
+            module = fun.fun.__module__
+            functions[fun.name] = {
+                "module": module,
+                # Scripts run as __main__ are imported from their file
+                "file": os.path.abspath(inspect.getsourcefile(fun.fun)) if module == "__main__" else None,
+                "qualname": fun.fun.__qualname__,
+                "descr": fun.descr,
+                "cacheable": hasattr(fun.fun, "__funcli_cache__"),
+                "piped": self.get_piped_arg(fun.name),
+                "args": args,
+            }
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "prog": self.parser.prog,
+            "version": self.module_version_repr,
+            "doc": self.module_doc,
+            "default_function_name": self.default_function_name,
+            "functions": functions,
+        }
+
+    def export_schema(self, path: str):
+        """
+        Write the schema of the CLI to a JSON file.
+        :param path: The JSON file path
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_schema(), file, indent=4)
+
+    def iter_full_help(self):
+        """
+        Render the help of every subcommand, one at a time.
+        :return: A generator of help texts
+        """
+        subparsers_actions = [action for action in self.parser._actions if isinstance(action, argparse._SubParsersAction)]
+        for subparsers_action in subparsers_actions:
+            # get all subparsers and print help
+            for choice, subparser in subparsers_action.choices.items():
+                yield (
+                    os.linesep + "-" * 80 + os.linesep + os.linesep
+                    + f"Help for subcommand '{choice}':" + os.linesep
+                    + subparser.format_help()
+                )
+
+    def write_full_help(self, file=None):
+        """
+        Write the help of the CLI followed by the help of every subcommand.
+        Each subcommand help is written as soon as it's rendered, the whole help is never built.
+        In the json help format, a single JSON document is written, with the help of every subcommand.
+        :param file: Where to write. Default to a pager when stdout is a terminal, see open_pager
+        """
+        with contextlib.ExitStack() as stack:
+            if file is None:
+                file = stack.enter_context(open_pager())
+            if help_format.get() == "json":
+                full_help = self.parser.to_help_json()
+                full_help["subcommands"] = {
+                    choice: subparser.to_help_json() for choice, subparser in self.subparsers.choices.items()
+                }
+                json.dump(full_help, file, indent=4)
+                file.write(os.linesep)
+                return
+            file.write(self.parser.format_help())
+            for subcommand_help in self.iter_full_help():
+                file.write(subcommand_help)
+
+    def run(self, argv: list = None):
+        """
+        Parse argv and call the selected function.
+        :param argv: The args, without the script name. Default to sys.argv[1:]
+        :return: (function_result, parsed_args, parser)
+                When the function returned a generator, function_result is the number of streamed items
+        """
+        if importing_script.get():
+            log.debug(f"    imported by a SchemaCli, not run")
+            return None, {}, self.parser
+        if argv is None:
+            argv = sys.argv[1:]
+        invocation = list(argv)  # Recorded in the journal
+
+        # Split the pipeline, the root options are parsed with the first function
+        stages = [[]]
+        for token in argv:
+            if token == PIPELINE_SEPARATOR:
+                stages.append([])
+            else:
+                stages[-1].append(token)
+        argv = stages.pop(0)
+
+        parsed_args = self.parse(argv)
         
-        parsed_args_tmp[key] = value
-    parsed_args = parsed_args_tmp
-
-    # Call function
-    log.debug(f"")
-    log.debug(f"")
-    log.debug(f"Calling function...")
-    log.debug(f"---------------")
-    try:
-        function_result = function(**parsed_args)
-        return function_result, parsed_args, parser
-    except ArgError as e:
-        print(f"ERROR: {e}")
-        print()
-        if exit_on_error:
-            sys.exit(1)
-    except TypeError as e:
-        if e.__str__().startswith(f"{function_name}()") and e.__str__().__contains__(f"required positional argument"):
-            # Not sure this branch can be take....
+        # If full help is called, display it
+        requested_help_format = parsed_args.pop("help_format")  # Clean parsed_args for further processing by the function
+        if parsed_args["full_help"]:
+            with set_context(help_format, requested_help_format):
+                self.write_full_help()  # Only render every subcommand help when asked
+            if self.exit_on_error:
+                sys.exit(0)
+        del parsed_args["full_help"]  # Clean parsed_args for further processing by the function
+
+        # If version is called, display it
+        if parsed_args["version"]:
+            print(f"{self.module_version_repr}")
+            if self.exit_on_error:
+                sys.exit(0)
+        del parsed_args["version"]  # Clean parsed_args for further processing by the function
+
+        no_cache = parsed_args.pop("no_cache", False)  # Clean parsed_args for further processing by the function
+
+        # Override the default limits with the limit options
+        limits = dataclasses.replace(self.limits)
+        for limit in ["timeout", "max_rss", "cpu_seconds"]:
+            value = parsed_args.pop(limit, None)  # Clean parsed_args for further processing by the function
+            if value is not None:
+                setattr(limits, limit, value)
+
+        # Run a recorded call again
+        replay = parsed_args.pop("replay", None)  # Clean parsed_args for further processing by the function
+        if replay is not None:
+            import sqlite3
+            try:
+                entry = self.journal.get(replay)
+            except (OSError, sqlite3.Error) as e:
+                self.parser.error(f"argument --replay: can't read the journal: {e}")
+            if entry is None:
+                self.parser.error(f"argument --replay: no call {replay} in the journal")
+            log.debug(f"    replaying {entry.argv}")
+            return self.run(entry.argv)
+
+        # Serve the functions until interrupted
+        address = parsed_args.pop("serve", None)  # Clean parsed_args for further processing by the function
+        if address is not None:
+            self.serve(address, no_cache=no_cache, limits=limits)
+            return None
+        
+        # Select fun to call
+        if not parsed_args["subcommand"]:
+            if self.default_function_name == "":
+                print("Subcommand required!")
+                self.parser.print_usage()
+                if self.exit_on_error:
+                    sys.exit(1)
+                return None
+            else:
+                parsed_args["subcommand"] = self.default_function_name
+        function_name = parsed_args["subcommand"]
+        # Clean parsed_args for further processing by the function
+        del parsed_args["subcommand"]
+        log.debug(f"    {function_name=}")
+
+        # Clean args
+        columns = parsed_args.pop("from_table", None)  # Clean parsed_args for further processing by the function
+        if columns is not None and stages:
+            self.parser.error(f"--from-table can't be used in a pipeline")
+        parsed_args = self.cast_args(function_name, parsed_args)
+        pipeline = [(function_name, parsed_args)] + [self.parse_stage(stage) for stage in stages]
+
+        # Call function
+        started = time.time()
+        started_monotonic = time.monotonic()
+        exit_status = 1
+        function_result = None
+        try:
+            if columns is not None:
+                function_result = self.call_table(function_name, parsed_args, columns, no_cache=no_cache, limits=limits)
+            else:
+                function_result = self.call_pipeline(pipeline, no_cache=no_cache, limits=limits)
+            exit_status = 0
+            return function_result, parsed_args, self.parser
+        except (ArgError, LimitError) as e:
             print(f"ERROR: {e}")
             print()
-            if exit_on_error:
+            if self.exit_on_error:
                 sys.exit(1)
-        else:
-            raise e
\ No newline at end of file
+        except TypeError as e:
+            if e.__str__().startswith(f"{function_name}()") and e.__str__().__contains__(f"required positional argument"):
+                # Not sure this branch can be take....
+                print(f"ERROR: {e}")
+                print()
+                if self.exit_on_error:
+                    sys.exit(1)
+            else:
+                raise e
+        finally:
+            if self.journal is not None:
+                self.journal.record(
+                    command=f" {PIPELINE_SEPARATOR} ".join(stage_name for stage_name, _ in pipeline),
+                    argv=invocation,
+                    args=parsed_args,
+                    started=started,
+                    duration=time.monotonic() - started_monotonic,
+                    exit_status=exit_status,
+                    result=function_result,
+                )
+            result_cache.log_stats()
+
+
+class SchemaCli(Cli):
+    """
+    A CLI built from a schema exported by Cli.export_schema.
+
+    The parser is built from the schema alone: help, version and invalid args are handled
+    without importing the functions. The module of a function is only imported once its
+    args are valid, then the function is called like in a Cli.
+    """
+
+    def __init__(
+        self,
+        schema: dict,
+        exit_on_error=True,
+        stream_buffer_size: int = 64 * 1024,
+        stream_flush_interval: float = 1.0,
+        limits: Limits = None,
+        limit_options: bool = False,
+        serve_option: bool = False,
+        journal: Journal = None,
+        table_option: bool = False,
+    ):
+        """
+        :param schema: The schema, see Cli.to_schema
+        :param exit_on_error: Force parser to exit script if error happen in parsing args
+        :param stream_buffer_size: See Cli
+        :param stream_flush_interval: See Cli
+        :param limits: See Cli
+        :param limit_options: See Cli
+        :param serve_option: See Cli
+        :param journal: See Cli
+        :param table_option: See Cli
+        """
+        if schema.get("schema_version") != SCHEMA_VERSION:
+            raise ValueError(f"unsupported schema version: {schema.get('schema_version')}")
+        self.schema = schema
+        self.default_function_name = schema["default_function_name"]
+        self.exit_on_error = exit_on_error
+        self.stream_buffer_size = stream_buffer_size
+        self.stream_flush_interval = stream_flush_interval
+        self.limits = limits if limits is not None else Limits()
+        self.limit_options = limit_options
+        self.serve_option = serve_option
+        self.journal = journal
+        self.table_option = table_option
+        self.module_version_repr = schema["version"]
+        self.module_doc = schema["doc"]
+        self.functions = schema["functions"]
+        self.definitions: dict[str: Function] = {}  # Filled when a function is imported
+        self.function_clis: dict[str: Cli] = {}
+        self.script_modules: dict[str: types.ModuleType] = {}  # The __main__ scripts already run, by file
+        self.partial_parsers: dict[tuple: ArgumentParser] = {}
+
+        self.parser = ArgumentParser(
+            prog=schema["prog"],
+            description=self.module_doc,
+            exit_on_error=exit_on_error,
+            formatter_class=argparse.RawTextHelpFormatter,
+        )
+        self.subparsers = self.parser.add_subparsers(dest="subcommand")
+        for function_name, function in self.functions.items():
+            subparser = self.subparsers.add_parser(
+                name=function_name,
+                help=function["descr"],
+                description=function["descr"],
+                epilog=TABLE_OPTION_HELP if self.table_option else None,
+                formatter_class=HelpFormatter,
+            )
+            args_group = subparser.add_argument_group("args")
+            args_group.funcli_table = None
+            for arg_name, arg in function["args"].items():
+                if arg["type"] == "bool":
+                    action = argparse.BooleanOptionalAction
+                elif arg["list"]:
+                    action = CustomAppendAction
+                else:
+                    action = "store"
+                action = args_group.add_argument(
+                    f"--{arg_name}",
+                    action=action,
+                    default=arg["default"],
+                    type=SCHEMA_CONVERTERS[arg["type"]],
+                    choices=arg["choices"],
+                    required=arg["required"],
+                    help=arg["help"].replace("%", "%%"),
+                )
+                action.funcli_help_row = HelpRow(
+                    required=arg["required"],
+                    multiple=arg["list"],
+                    type_name=arg["type_name"],
+                    default=arg["default_text"],
+                    description=arg["description"],
+                )
+
+        self.add_root_options(cacheable=any(function["cacheable"] for function in self.functions.values()))
+
+    def register(self, function, name: str = None):
+        raise TypeError("a SchemaCli is built from its schema, export the schema of the Cli again")
+
+    def unregister(self, name: str):
+        raise TypeError("a SchemaCli is built from its schema, export the schema of the Cli again")
+
+    def get_function_cli(self, function_name: str) -> Cli:
+        """
+        Import a function and build its Cli.
+        :param function_name: The subcommand name
+        :return: A Cli of this only function
+        """
+        if function_name not in self.function_clis:
+            function_schema = self.functions[function_name]
+            log.debug(f"importing {function_schema['module']}.{function_schema['qualname']}")
+            file = function_schema["file"]
+            if file is not None:
+                if file not in self.script_modules:  # Run once, so the functions of a script share its classes
+                    module_name = f"funcli_schema_{os.path.splitext(os.path.basename(file))[0]}"
+                    spec = importlib.util.spec_from_file_location(module_name, file)
+                    module = importlib.util.module_from_spec(spec)
+                    with set_context(importing_script, True):  # Scripts often call fun_to_cli without a __name__ guard
+                        spec.loader.exec_module(module)
+                    self.script_modules[file] = module
+                module = self.script_modules[file]
+            else:
+                module = importlib.import_module(function_schema["module"])
+            function = module
+            for name in function_schema["qualname"].split("."):
+                function = getattr(function, name)
+
+            cli = Cli(
+                [function],
+                exit_on_error=self.exit_on_error,
+                stream_buffer_size=self.stream_buffer_size,
+                stream_flush_interval=self.stream_flush_interval,
+                prog=self.parser.prog,
+                module=module,
+                limits=self.limits,
+            )
+            self.function_clis[function_name] = cli
+            self.definitions[function_name] = cli.definitions[function.__name__]
+        return self.function_clis[function_name]
+
+    def get_piped_arg(self, function_name: str) -> str:
+        return self.functions[function_name].get("piped", next(iter(self.functions[function_name]["args"]), None))
+
+    def cast_args(self, function_name: str, parsed_args: dict) -> dict:
+        cli = self.get_function_cli(function_name)
+        fun: Function = self.definitions[function_name]
+        parsed_args = dict(parsed_args)
+        for arg_name, arg in self.functions[function_name]["args"].items():
+            if arg_name not in parsed_args:  # Piped
+                continue
+            value = parsed_args[arg_name]
+            if value is arg["default"]:  # Not specified, use the actual default instead of its JSON form
+                parsed_args[arg_name] = fun.args[arg_name].default
+            elif arg["type"] is None and value is not None:
+                # Args with types unknown to the schema were parsed as str, convert them now
+                convert = fun.args[arg_name].translated_type
+                try:
+                    parsed_args[arg_name] = [convert(item) for item in value] if arg["list"] else convert(value)
+                except (TypeError, ValueError, argparse.ArgumentTypeError):  # Like the parser of a Cli
+                    type_name = getattr(convert, "__name__", repr(convert))
+                    self.subparsers.choices[function_name].error(f"argument --{arg_name}: invalid {type_name} value: {value!r}")
+        return cli.cast_args(fun.name, parsed_args)
+
+    def call(
+        self, function_name: str, parsed_args: dict, no_cache: bool = False, limits: Limits = None, stream: bool = True
+    ):
+        cli = self.get_function_cli(function_name)
+        return cli.call(
+            self.definitions[function_name].name, parsed_args, no_cache=no_cache, limits=limits, stream=stream
+        )
+
+    def invoke(
+        self,
+        function_name: str,
+        parsed_args: dict,
+        stack: contextlib.ExitStack,
+        limits: Limits,
+        no_cache: bool = False,
+        piped_args: dict = None,
+    ):
+        cli = self.get_function_cli(function_name)
+        return cli.invoke(
+            self.definitions[function_name].name, parsed_args, stack, limits, no_cache=no_cache, piped_args=piped_args
+        )
+
+    def to_schema(self) -> dict:
+        return self.schema
+
+
+def load_schema(path: str, exit_on_error=True, **kwargs) -> SchemaCli:
+    """
+    Build a CLI from a schema file exported by Cli.export_schema, without importing the functions.
+
+        funcli.load_schema("tool.json").run()
+
+    :param path: The JSON file path
+    :param exit_on_error: Force parser to exit script if error happen in parsing args
+    :param kwargs: Other SchemaCli options
+    :return: The CLI
+    """
+    with open(path) as file:
+        schema = json.load(file)
+    return SchemaCli(schema, exit_on_error=exit_on_error, **kwargs)
+
+
+def fun_to_cli(
+    functions,
+    default_function_name: str = "",
+    exit_on_error=True,
+    stream_buffer_size: int = 64 * 1024,
+    stream_flush_interval: float = 1.0,
+    limits: Limits = None,
+    limit_options: bool = False,
+    serve_option: bool = False,
+    journal: Journal = None,
+    table_option: bool = False,
+):
+    """
+    Turn functions into cli utility.
+
+    Give it a list of functions and it will:
+    - Build an arg parser to parse cli commands
+    - Automatically generate the cli help using docstring witch description, arg type, default value...
+    - Handle raised funcli.*Error exceptions raised by the called function by displaying an error, help and exiting properly
+
+    :param functions: A list of functions. Eg: [print, json.dumps, ]
+    :param default_function_name: The name of the default function if no subcommand is called in CLI
+            It can only be a function that takes no required args
+    :param exit_on_error: Force parser to exit script if error happen in parsing args
+    :param stream_buffer_size: When a function returns a generator, its items are streamed to stdout
+            through a buffer flushed every stream_buffer_size chars...
+    :param stream_flush_interval: ... or every stream_flush_interval seconds
+    :param limits: The default limits of every call (timeout, max resident memory, CPU seconds)
+    :param limit_options: Add the --timeout, --max-rss and --cpu-seconds options to override limits
+    :param serve_option: Add the --serve [HOST]:PORT option to serve the functions over HTTP and JSON-RPC
+    :param journal: Record every call in this journal, and add the --replay ID option to run a recorded call again
+    :param table_option: Accept --from-table PATH after a subcommand, to call it for each row of a CSV/Parquet table
+    :return: (function_result, parsed_args, parser)
+            When the function returned a generator, function_result is the number of streamed items
+    """
+    cli = Cli(
+        functions,
+        default_function_name=default_function_name,
+        exit_on_error=exit_on_error,
+        stream_buffer_size=stream_buffer_size,
+        stream_flush_interval=stream_flush_interval,
+        limits=limits,
+        limit_options=limit_options,
+        serve_option=serve_option,
+        journal=journal,
+        table_option=table_option,
+    )
+    return cli.run()
+
+
+@dataclass
+class Result:
+    """The outcome of a CLI invocation by CliRunner."""
+    exit_code: int
+    stdout: str
+    stderr: str
+    return_value: typing.Any = None  # The function result
+    exception: BaseException = None  # The exception raised by the function, if any
+
+
+class CliRunner:
+    """
+    Invoke a Cli in-process, for tests.
+
+    The parser is built once with the Cli and reused by every invocation.
+    stdout and stderr are captured and sys.exit is caught to get the exit code.
+    The capture replaces sys.stdout and sys.stderr, so invocations can't run in several threads at once.
+
+        runner = funcli.CliRunner(funcli.Cli([hello], "hello", prog="demo.py"))
+        result = runner.invoke(["hello", "--name", "john"])
+        assert result.exit_code == 0
+    """
+
+    def __init__(self, cli: Cli, catch_exceptions: bool = True):
+        """
+        :param cli: The CLI to invoke
+        :param catch_exceptions: Store unexpected exceptions in the result instead of raising them
+        """
+        self.cli = cli
+        self.catch_exceptions = catch_exceptions
+
+    def invoke(self, argv) -> Result:
+        """
+        Run the CLI with argv.
+        :param argv: The args, without the script name. A list or a command line string
+        :return: The result of the invocation
+        """
+        if isinstance(argv, str):
+            argv = shlex.split(argv)
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        exit_code = 0
+        return_value = None
+        exception = None
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                run_result = self.cli.run(list(argv))
+                if run_result is not None:
+                    return_value = run_result[0]
+            except SystemExit as e:
+                if e.code is None:
+                    exit_code = 0
+                elif isinstance(e.code, int):
+                    exit_code = e.code
+                else:
+                    print(e.code, file=sys.stderr)
+                    exit_code = 1
+            except Exception as e:
+                if not self.catch_exceptions:
+                    raise
+                exception = e
+                exit_code = 1
+        return Result(
+            exit_code=exit_code,
+            stdout=stdout.getvalue(),
+            stderr=stderr.getvalue(),
+            return_value=return_value,
+            exception=exception,
+        )
+
+
+class WorkerPool:
+    """
+    Run invocations of a Cli in a pool of forked worker processes.
+
+    The Cli is built once in the parent, then workers are forked from it: they share its
+    parser and definitions copy-on-write and don't import or build anything.
+    Each argv is sent to an idle worker through a pipe, the worker runs it like CliRunner
+    and sends back the Result. A worker that dies is replaced.
+    Only available where the fork start method is (not on Windows).
+
+        with funcli.WorkerPool(cli, processes=4) as pool:
+            results = pool.map([["report", "--year", "2020"], ["report", "--year", "2021"]])
+    """
+
+    def __init__(self, cli: Cli, processes: int = None, limits: Limits = None, kill_grace: float = 1.0):
+        """
+        :param cli: The CLI to run
+        :param processes: The number of workers. Default to the number of CPUs
+        :param limits: The limits of each call in the workers. Default to the Cli limits
+        :param kill_grace: A worker still running a call kill_grace seconds after its timeout is killed
+        """
+        self.cli = cli
+        self.processes = processes or os.cpu_count() or 1
+        self.limits = limits if limits is not None else cli.limits
+        self.kill_grace = kill_grace
+        import multiprocessing  # Slow to import, only needed by the pool
+        self.context = multiprocessing.get_context("fork")
+        self.workers = []  # (process, connection)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        """Fork the workers."""
+        gc.collect()
+        gc.freeze()  # Keep the gc from touching, and so copying, the objects shared with the workers
+        try:
+            for _ in range(self.processes):
+                self.workers.append(self.spawn())
+        finally:
+            gc.unfreeze()
+
+    def spawn(self):
+        parent_connection, child_connection = self.context.Pipe()
+        process = self.context.Process(target=self.work, args=(child_connection,), daemon=True)
+        process.start()
+        child_connection.close()
+        return process, parent_connection
+
+    def work(self, connection):
+        """The loop of a worker: run each received argv until None is received."""
+        self.cli.limits = self.limits  # Only changes the copy of the Cli in this worker
+        runner = CliRunner(self.cli)
+        while True:
+            try:
+                argv = connection.recv()
+            except EOFError:
+                break
+            if argv is None:
+                break
+            result = runner.invoke(argv)
+            try:
+                connection.send(result)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                # The function result or exception can't be sent back, send their repr
+                result.return_value = repr(result.return_value)
+                result.exception = RuntimeError(repr(result.exception)) if result.exception else None
+                connection.send(result)
+        if self.cli.journal is not None:  # Workers exit without running atexit
+            self.cli.journal.close()
+
+    def map(self, argvs) -> list:
+        """
+        Run many invocations in parallel.
+        :param argvs: The args of each invocation, lists or command line strings
+        :return: The results, in the order of argvs
+        """
+        import multiprocessing.connection
+        argvs = list(argvs)
+        results = [None] * len(argvs)
+        jobs = iter(enumerate(argvs))
+        idle = list(range(len(self.workers)))
+        busy = {}  # connection: (worker index, job index, deadline)
+        while True:
+            while idle:
+                job = next(jobs, None)
+                if job is None:
+                    break
+                job_index, argv = job
+                worker_index = idle.pop()
+                connection = self.workers[worker_index][1]
+                connection.send(argv)
+                deadline = None
+                if self.limits.timeout is not None:
+                    deadline = time.monotonic() + self.limits.timeout + self.kill_grace
+                busy[connection] = (worker_index, job_index, deadline)
+            if not busy:
+                break
+
+            deadlines = [deadline for _, _, deadline in busy.values() if deadline is not None]
+            wait_timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            for connection in multiprocessing.connection.wait(list(busy), timeout=wait_timeout):
+                worker_index, job_index, _ = busy.pop(connection)
+                try:
+                    results[job_index] = connection.recv()
+                except EOFError:  # The worker died
+                    process = self.workers[worker_index][0]
+                    process.join()
+                    log.debug(f"worker {process.pid} died with exit code {process.exitcode}")
+                    results[job_index] = Result(
+                        exit_code=process.exitcode or 1,
+                        stdout="",
+                        stderr=f"worker died with exit code {process.exitcode}",
+                    )
+                    self.replace(worker_index)
+                idle.append(worker_index)
+
+            # Kill the workers that didn't stop their call after its timeout
+            for connection, (worker_index, job_index, deadline) in list(busy.items()):
+                if deadline is not None and time.monotonic() >= deadline:
+                    del busy[connection]
+                    process = self.workers[worker_index][0]
+                    process.kill()
+                    process.join()
+                    log.debug(f"worker {process.pid} killed after the timeout")
+                    error = LimitError("timeout", f"call exceeded {self.limits.timeout}s, worker killed")
+                    results[job_index] = Result(exit_code=1, stdout="", stderr=f"ERROR: {error}", exception=error)
+                    self.replace(worker_index)
+                    idle.append(worker_index)
+        return results
+
+    def replace(self, worker_index: int):
+        """Replace a dead worker."""
+        self.workers[worker_index][1].close()
+        self.workers[worker_index] = self.spawn()
+
+    def invoke(self, argv) -> Result:
+        """
+        Run one invocation in a worker.
+        :param argv: The args, a list or a command line string
+        :return: The result
+        """
+        return self.map([argv])[0]
+
+    def close(self):
+        """Stop the workers."""
+        for process, connection in self.workers:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process, connection in self.workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+            connection.close()
+        self.workers = []
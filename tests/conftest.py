@@ -0,0 +1,26 @@
+import os
+import shutil
+import tempfile
+import pytest
+
+
+def pytest_configure(config):
+	# The test modules build their Cli when imported, before any fixture runs
+	config.funcli_cache_dir = tempfile.mkdtemp(prefix="funcli-")
+	config.funcli_previous_cache_dir = os.environ.get("FUNCLI_CACHE_DIR")
+	os.environ["FUNCLI_CACHE_DIR"] = config.funcli_cache_dir
+
+
+def pytest_unconfigure(config):
+	if config.funcli_previous_cache_dir is None:
+		os.environ.pop("FUNCLI_CACHE_DIR", None)
+	else:
+		os.environ["FUNCLI_CACHE_DIR"] = config.funcli_previous_cache_dir
+	shutil.rmtree(config.funcli_cache_dir, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+	# The results, the inline docs and the journal of each test go to its own dir, not to ~/.cache/funcli
+	monkeypatch.setenv("FUNCLI_CACHE_DIR", str(tmp_path))
+	return tmp_path
@@ -72,6 +72,9 @@ def raise_error():
 	raise funcli.ArgError(arg_name="test", message="This arg value doesn't look right")
 
 
+functions = [simple, default_value, a_bool, raise_error, an_int]
+
+
 if __name__ == "__main__":
-	funcli.fun_to_cli([simple, default_value, a_bool, raise_error, an_int], "simple")
+	funcli.fun_to_cli(functions, "simple")
 
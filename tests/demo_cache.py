@@ -0,0 +1,68 @@
+"""
+This is a demo script to be used only for tests.
+Not a good implementation as an example for humans.
+"""
+
+import logging
+import sys
+import typing
+import funcli
+
+__app_name__ = "Demo"
+__version__ = "0.0.1"
+__author__ = "gme"
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+handler = logging.StreamHandler(sys.stdout)
+handler.setLevel(logging.DEBUG)
+formatter = logging.Formatter('%(message)s')
+handler.setFormatter(formatter)
+log.addHandler(handler)
+
+funcli.log = log
+
+
+@funcli.cacheable(ttl=60)
+def report(year: int):
+	"""
+	cacheable function printing when it's actually called
+	:param year:
+	:return:
+	"""
+	print(f"computed={year}")
+	return year * 2
+
+
+@funcli.cacheable(ttl=60)
+def size(data: typing.BinaryIO):
+	"""
+	cacheable function reading a file
+	:param data:
+	:return:
+	"""
+	content = data.read()
+	print(f"computed={len(content)}")
+	return len(content)
+
+
+@funcli.cacheable(ttl=60)
+def squares(n: int):
+	"""
+	cacheable function with a comprehension, a nested code object
+	:param n:
+	:return:
+	"""
+	print(f"computed={n}")
+	return [i * i for i in range(n) if i not in {1000, 1001}]
+
+
+functions = [report, size, squares]
+
+
+if __name__ == "__main__":
+	function_result, parsed_args, parser = funcli.fun_to_cli(functions)
+	print(f"result={function_result}")
+	print(f"cache={funcli.result_cache.hits}/{funcli.result_cache.misses}")
+
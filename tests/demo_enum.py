@@ -47,6 +47,9 @@ def an_enum_list(value: list[Value]):
 
 
 
+functions = [an_enum, an_enum_list]
+
+
 if __name__ == "__main__":
-	funcli.fun_to_cli([an_enum, an_enum_list])
+	funcli.fun_to_cli(functions)
 
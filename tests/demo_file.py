@@ -0,0 +1,50 @@
+"""
+This is a demo script to be used only for tests.
+Not a good implementation as an example for humans.
+"""
+
+import logging
+import sys
+import typing
+import funcli
+
+__app_name__ = "Demo"
+__version__ = "0.0.1"
+__author__ = "gme"
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+handler = logging.StreamHandler(sys.stdout)
+handler.setLevel(logging.DEBUG)
+formatter = logging.Formatter('%(message)s')
+handler.setFormatter(formatter)
+log.addHandler(handler)
+
+funcli.log = log
+
+
+def a_mapped_file(data: memoryview):
+	"""
+	function with a memory mapped file
+	:param data:
+	:return:
+	"""
+	print(f"result={bytes(data[:5])}, {len(data)}")
+
+
+def a_binary_file(data: typing.BinaryIO):
+	"""
+	function with a file opened as a binary reader
+	:param data:
+	:return:
+	"""
+	print(f"result={data.read(5)}")
+
+
+functions = [a_mapped_file, a_binary_file]
+
+
+if __name__ == "__main__":
+	funcli.fun_to_cli(functions)
+
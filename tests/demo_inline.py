@@ -0,0 +1,57 @@
+"""
+This is a demo script to be used only for tests.
+Not a good implementation as an example for humans.
+"""
+
+import logging
+import sys
+import funcli
+
+__app_name__ = "Demo"
+__version__ = "0.0.1"
+__author__ = "gme"
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+handler = logging.StreamHandler(sys.stdout)
+handler.setLevel(logging.DEBUG)
+formatter = logging.Formatter('%(message)s')
+handler.setFormatter(formatter)
+log.addHandler(handler)
+
+funcli.log = log
+
+
+def say_hello(
+	name: str = "world",  # The name of the guy to say hello to
+	# Eg: "john"
+	age: int = 42,  # The age of the guy
+	lang: str = "en",
+):
+	"""
+	function with args described by inline comments
+	:param lang: The language, described in the docstring
+	:return:
+	"""
+	print(f"result={name}, {age}, {lang}")
+
+
+def say_hello_twice(
+	name: str = "world",  # ref=say_hello.name
+	# He will be greeted twice
+):
+	"""
+	ref=say_hello.__doc__
+	And twice!
+	"""
+	say_hello(name)
+	say_hello(name)
+
+
+functions = [say_hello, say_hello_twice]
+
+
+if __name__ == "__main__":
+	funcli.fun_to_cli(functions, "say_hello")
+
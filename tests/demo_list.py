@@ -51,6 +51,9 @@ def an_str_list(a_list:list[str]):
 	print(f"result={a_list=}")
 
 
+functions = [an_unspecified_list, an_int_list, an_str_list]
+
+
 if __name__ == "__main__":
-	funcli.fun_to_cli([an_unspecified_list, an_int_list, an_str_list])
+	funcli.fun_to_cli(functions)
 
@@ -0,0 +1,52 @@
+"""
+This is a demo script to be used only for tests.
+Not a good implementation as an example for humans.
+"""
+
+import logging
+import sys
+import funcli
+
+__app_name__ = "Demo"
+__version__ = "0.0.1"
+__author__ = "gme"
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.INFO)
+handler = logging.StreamHandler(sys.stderr)
+handler.setLevel(logging.INFO)
+formatter = logging.Formatter('%(message)s')
+handler.setFormatter(formatter)
+log.addHandler(handler)
+
+funcli.log = log
+
+
+def rows(count: int = 10):
+	"""
+	function returning a generator
+	:param count:
+	:return:
+	"""
+	for index in range(count):
+		yield f"row={index}"
+
+
+async def async_rows(count: int = 10):
+	"""
+	function returning an async generator
+	:param count:
+	:return:
+	"""
+	for index in range(count):
+		yield f"row={index}"
+
+
+functions = [rows, async_rows]
+
+
+if __name__ == "__main__":
+	function_result, parsed_args, parser = funcli.fun_to_cli(functions, "rows")
+	print(f"result={function_result}", file=sys.stderr)
+
@@ -1,10 +1,14 @@
-import pytest
-import shlex
+import os
 import subprocess
+import sys
+import pytest
 import logging
 import rich
 from rich.logging import RichHandler
 
+import funcli
+import demo
+
 log = logging.getLogger(name=__name__)
 
 log.setLevel(logging.DEBUG)
@@ -14,14 +18,16 @@ handler = RichHandler(console=console)
 handler.setLevel(logging.DEBUG)
 log.addHandler(handler)
 
+runner = funcli.CliRunner(funcli.Cli(demo.functions, "simple", prog="demo.py", module=demo))
+
 
 
 
 
 def test_simple_call():
-	result = subprocess.run(shlex.split("../venv/bin/python3.9 demo.py simple"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("simple")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -30,9 +36,9 @@ def test_simple_call():
 	assert stdout.__contains__("result=ok")
 
 def test_default_fun_call():
-	result = subprocess.run(shlex.split("../venv/bin/python3.9 demo.py"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -42,9 +48,9 @@ def test_default_fun_call():
 
 
 def test_default_value_call():
-	result = subprocess.run(shlex.split("../venv/bin/python3.9 demo.py default_value"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("default_value")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -55,9 +61,9 @@ def test_default_value_call():
 
 
 def test_a_bool_true():
-	result = subprocess.run(shlex.split("../venv/bin/python3.9 demo.py a_bool --a_bool"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("a_bool --a_bool")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -65,11 +71,24 @@ def test_a_bool_true():
 	assert stdout.__contains__("result=True")
 
 def test_a_bool_false():
-	result = subprocess.run(shlex.split("../venv/bin/python3.9 demo.py a_bool --no-a_bool"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("a_bool --no-a_bool")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
 	print(f"{stderr=}")
 	assert stdout.__contains__("result=False")
+
+
+def test_import_is_light():
+	# Modules only needed by some features are imported when used, every CLI startup doesn't pay for them
+	code = "import sys, funcli; print(sorted(set(sys.argv[1:]) & set(sys.modules)))"
+	heavy = ["asyncio", "csv", "http.server", "multiprocessing", "queue", "sqlite3", "subprocess"]
+	result = subprocess.run(
+		[sys.executable, "-c", code, *heavy],
+		capture_output=True,
+		text=True,
+		env=dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+	)
+	assert result.stdout.strip() == "[]", result.stderr
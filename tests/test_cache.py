@@ -0,0 +1,117 @@
+import os
+import subprocess
+import sys
+import threading
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+import demo_cache
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+runner = funcli.CliRunner(funcli.Cli(demo_cache.functions, prog="demo_cache.py", module=demo_cache))
+
+
+@pytest.fixture(autouse=True)
+def result_cache(tmp_path, monkeypatch):
+	cache = funcli.ResultCache(directory=str(tmp_path))
+	monkeypatch.setattr(funcli, "result_cache", cache)
+	return cache
+
+
+def test_cache_miss_then_hit(result_cache):
+	result = runner.invoke("report --year 2000")
+	log.info(result.stdout)
+	assert result.stdout.__contains__("computed=2000")
+	assert result.return_value == 4000
+	assert (result_cache.hits, result_cache.misses) == (0, 1)
+	
+	result = runner.invoke("report --year 2000")
+	log.info(result.stdout)
+	assert not result.stdout.__contains__("computed=2000")
+	assert result.return_value == 4000
+	assert (result_cache.hits, result_cache.misses) == (1, 1)
+
+
+def test_cache_different_args(result_cache):
+	runner.invoke("report --year 2000")
+	result = runner.invoke("report --year 2001")
+	log.info(result.stdout)
+	assert result.stdout.__contains__("computed=2001")
+	assert (result_cache.hits, result_cache.misses) == (0, 2)
+
+
+def test_no_cache(result_cache):
+	runner.invoke("report --year 2000")
+	result = runner.invoke("--no-cache report --year 2000")
+	log.info(result.stdout)
+	assert result.stdout.__contains__("computed=2000")
+	assert (result_cache.hits, result_cache.misses) == (0, 1)
+
+
+def test_cache_file_changed(result_cache, tmp_path):
+	path = tmp_path / "data.bin"
+	path.write_bytes(b"abc")
+	assert runner.invoke(f"size --data {path}").return_value == 3
+	assert runner.invoke(f"size --data {path}").stdout == ""
+	path.write_bytes(b"abcdef")
+	result = runner.invoke(f"size --data {path}")
+	assert result.stdout.__contains__("computed=6")
+	assert result.return_value == 6
+
+
+def test_cache_concurrent_eviction(tmp_path):
+	cache = funcli.ResultCache(directory=str(tmp_path), max_size=2000)
+	errors = []
+
+	def fill(thread: int):
+		try:
+			for index in range(200):
+				key = f"{thread}-{index % 20}"
+				cache.set(key, b"x" * 300)
+				cache.get(key)
+		except OSError as e:
+			errors.append(e)
+
+	threads = [threading.Thread(target=fill, args=(thread, )) for thread in range(8)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	assert errors == []
+
+
+def test_cache_unwritable(tmp_path):
+	path = tmp_path / "file"
+	path.write_text("not a directory")
+	cache = funcli.ResultCache(directory=str(path / "results"))
+	cache.set("key", 1)  # Not cached, no error
+	assert cache.get("key") == (False, None)
+
+
+def test_cache_across_processes(tmp_path):
+	tests_dir = os.path.dirname(os.path.abspath(__file__))
+	stdouts = []
+	for seed in ["1", "2"]:  # Different hash seeds, like independent jobs
+		result = subprocess.run(
+			[sys.executable, os.path.join(tests_dir, "demo_cache.py"), "squares", "--n", "3"],
+			capture_output=True,
+			text=True,
+			env=dict(os.environ, FUNCLI_CACHE_DIR=str(tmp_path), PYTHONHASHSEED=seed, PYTHONPATH=os.path.dirname(tests_dir)),
+		)
+		assert result.returncode == 0, result.stderr
+		stdouts.append(result.stdout)
+	assert stdouts[0].__contains__("computed=3")
+	assert not stdouts[1].__contains__("computed=3")
+	assert stdouts[1].__contains__("result=[0, 1, 4]")
+	assert len(os.listdir(tmp_path / "results")) == 1
@@ -0,0 +1,143 @@
+import enum
+import random
+import threading
+import typing
+import pytest
+import logging
+import rich
+from concurrent.futures import ThreadPoolExecutor
+from rich.logging import RichHandler
+
+import funcli
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+THREADS = 16
+CALLS = 2000
+
+
+class Color(enum.Enum):
+	red = 1
+	blue = 2
+
+
+def collect(items: list[int], tags: list[str] = ["default"]):
+	"""
+	function with list args
+	:param items: the items
+	:param tags: ref=paint.color
+	"""
+	return items, tags
+
+
+def paint(color: Color, times: typing.Annotated[int, funcli.Range(1, 10)] = funcli.Lazy(lambda: 1)):
+	"""
+	function with an enum and a lazy default
+	:param color: the color
+	"""
+	return [color] * times
+
+
+def count(stop: int):
+	"""
+	ref=collect.__doc__
+	"""
+	yield from range(stop)
+
+
+def dispatch(cli: funcli.Cli, argv: list):
+	# Like Cli.call_json, without CliRunner that redirects the global stdout
+	with funcli.set_context(funcli.raise_parse_errors, True):
+		parsed_args = cli.parse(argv)
+	function_name = parsed_args["subcommand"]
+	parsed_args = {name: value for name, value in parsed_args.items() if name in cli.definitions[function_name].args}
+	return cli.call(function_name, cli.cast_args(function_name, parsed_args), stream=False)
+
+
+def make_call(index: int):
+	values = list(range(index % 5 + 1))
+	argv = ["collect"] + [f"--items={value}" for value in values] + (["--tags", str(index)] if index % 2 else [])
+	expected = (values, [str(index)] if index % 2 else ["default"])
+	if index % 3 == 1:
+		color = random.choice(list(Color))
+		argv = ["paint", "--color", color.name] + (["--times", str(index % 4 + 1)] if index % 4 else [])
+		expected = [color] * (index % 4 + 1)
+	elif index % 3 == 2:
+		argv = ["count", "--stop", str(index % 7)]
+		expected = list(range(index % 7))
+	return argv, expected
+
+
+def test_concurrent_calls():
+	cli = funcli.Cli([collect, paint, count], prog="test_concurrency.py")
+	calls = [make_call(index) for index in range(CALLS)]
+	with ThreadPoolExecutor(THREADS) as executor:
+		results = list(executor.map(lambda call: dispatch(cli, call[0]), calls))
+	for (argv, expected), result in zip(calls, results):
+		assert result == expected, argv
+
+
+def test_concurrent_errors():
+	cli = funcli.Cli([collect, paint, count], prog="test_concurrency.py")
+	argvs = [["paint", "--color", "green"], ["paint", "--color", "red", "--times", "11"], ["collect", "--items", "a"]]
+
+	def call(index: int):
+		try:
+			dispatch(cli, argvs[index % len(argvs)])
+		except (funcli.ArgumentParseError, funcli.ArgError) as e:
+			return type(e)
+		return None
+
+	with ThreadPoolExecutor(THREADS) as executor:
+		errors = list(executor.map(call, range(CALLS // 2)))
+	expected = [funcli.ArgumentParseError, funcli.ArgError, funcli.ArgumentParseError]
+	assert errors == [expected[index % len(argvs)] for index in range(CALLS // 2)]
+
+
+@pytest.mark.parametrize("attempt", range(5))
+def test_concurrent_help(attempt, monkeypatch):
+	monkeypatch.setenv("COLUMNS", "200")
+	# A new Cli each time: descriptions, help tables and partial parsers are filled by the threads together
+	cli = funcli.Cli([collect, paint, count], prog="test_concurrency.py")
+	barrier = threading.Barrier(THREADS)
+
+	def render(index: int):
+		barrier.wait()
+		function_name = list(cli.functions)[index % len(cli.functions)]
+		cli.get_partial_parser(function_name, (cli.get_piped_arg(function_name), ))
+		return function_name, cli.subparsers.choices[function_name].format_help()
+
+	with ThreadPoolExecutor(THREADS) as executor:
+		helps = list(executor.map(render, range(THREADS)))
+
+	reference = funcli.Cli([collect, paint, count], prog="test_concurrency.py")
+	for function_name, help_text in helps:
+		assert help_text == reference.subparsers.choices[function_name].format_help()
+	assert reference.subparsers.choices["count"].description == "function with list args"
+	assert len(cli.partial_parsers) == len(cli.functions)
+
+
+def test_definitions_read_only():
+	cli = funcli.Cli([collect], prog="test_concurrency.py")
+	with pytest.raises(TypeError):
+		cli.definitions["collect"].args["items"] = None
+	definitions = funcli.definitions
+	cli.register(paint)
+	assert definitions.get("paint") is not cli.definitions["paint"]  # Replaced, not mutated
+	assert funcli.definitions["paint"] is cli.definitions["paint"]
+
+
+def test_concurrent_cache_counters(tmp_path):
+	cache = funcli.ResultCache(directory=str(tmp_path))
+	cache.set("key", 1)
+	with ThreadPoolExecutor(THREADS) as executor:
+		list(executor.map(lambda index: cache.get("key" if index % 2 else "missing"), range(CALLS)))
+	assert (cache.hits, cache.misses) == (CALLS // 2, CALLS // 2)
+
@@ -0,0 +1,94 @@
+import typing
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+called = []
+
+
+@funcli.constraint(lambda names, scores: len(names) == len(scores), "give a score for each name")
+def rank(
+	names: typing.Annotated[list[str], funcli.Len(1, 3), funcli.Pattern(r"[a-z]+")],
+	scores: list[typing.Annotated[int, funcli.Range(0, 100)]],
+	title: typing.Annotated[str, funcli.Len(max=5)] = "top",
+	ratio: typing.Annotated[float, funcli.Range(min=0)] = None,
+):
+	"""
+	function with constrained args
+	"""
+	called.append(names)
+	print(f"result={title}:{dict(zip(names, scores))}")
+
+
+def source(count: int):
+	"""
+	function returning a list
+	"""
+	return list(range(count))
+
+
+def positive(values, minimum: typing.Annotated[int, funcli.Range(min=0)] = 0):
+	"""
+	function receiving piped values
+	"""
+	return [value for value in values if value >= minimum]
+
+
+runner = funcli.CliRunner(funcli.Cli([rank, source, positive], prog="test_constraints.py"))
+
+
+@pytest.fixture(autouse=True)
+def clear_called():
+	called.clear()
+
+
+def test_constraints_valid():
+	result = runner.invoke("rank --names a --names b --scores 1 --scores 100 --ratio 0.5")
+	log.info(result.stdout)
+	assert result.exit_code == 0
+	assert result.stdout.__contains__("result=top:{'a': 1, 'b': 100}")
+
+
+@pytest.mark.parametrize("argv, error", [
+	("rank --names a --scores 101", "ERROR: scores: item 1 must be between 0 and 100, got 101"),
+	("rank --names a --names B --scores 1 --scores 2", "ERROR: names: item 2 must match '[a-z]+', got 'B'"),
+	("rank --names a --names b --names c --names d --scores 1 --scores 1 --scores 1 --scores 1",
+		"ERROR: names: length must be between 1 and 3, got 4"),
+	("rank --names a --scores 1 --title longtitle", "ERROR: title: length must be <= 5, got 9"),
+	("rank --names a --scores 1 --ratio -1", "ERROR: ratio: must be >= 0, got -1.0"),
+	("rank --names a --names b --scores 1", "ERROR: names, scores: give a score for each name"),
+])
+def test_constraints_invalid(argv, error):
+	result = runner.invoke(argv)
+	log.info(result.stdout)
+	assert result.exit_code == 1
+	assert result.stdout.__contains__(error)
+	assert called == []  # Checked before the call
+
+
+def test_constraints_pipeline():
+	result = runner.invoke("source --count 3 :: positive --minimum -1")
+	assert result.exit_code == 1
+	assert result.stdout.__contains__("ERROR: minimum: must be >= 0, got -1")
+
+
+def test_constraint_unknown_arg():
+	with pytest.raises(ValueError):
+		funcli.constraint(lambda nope: True, "never")(source)
+
+
+def test_constraint_abstract():
+	with pytest.raises(TypeError):
+		funcli.Constraint()
@@ -1,10 +1,11 @@
 import pytest
-import shlex
-import subprocess
 import logging
 import rich
 from rich.logging import RichHandler
 
+import funcli
+import demo_enum
+
 log = logging.getLogger(name=__name__)
 
 log.setLevel(logging.DEBUG)
@@ -14,12 +15,12 @@ handler = RichHandler(console=console)
 handler.setLevel(logging.DEBUG)
 log.addHandler(handler)
 
+runner = funcli.CliRunner(funcli.Cli(demo_enum.functions, prog="demo_enum.py", module=demo_enum))
+
 def test_an_enum():
-	result = subprocess.run(
-		shlex.split("../venv/bin/python3.9 demo_enum.py an_enum --value value2"),
-		stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("an_enum --value value2")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -27,13 +28,9 @@ def test_an_enum():
 	assert stdout.__contains__("result=value2")
 
 def test_error_an_enum():
-	result = subprocess.run(
-		shlex.split("../venv/bin/python3.9 demo_enum.py an_enum --value valuenotexist"),
-		stdout=subprocess.PIPE,
-		stderr=subprocess.PIPE
-	)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("an_enum --value valuenotexist")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -42,11 +39,9 @@ def test_error_an_enum():
 
 
 def test_an_enum_list():
-	result = subprocess.run(
-		shlex.split("../venv/bin/python3.9 demo_enum.py an_enum_list --value value1 --value value2"),
-		stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("an_enum_list --value value1 --value value2")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -55,11 +50,9 @@ def test_an_enum_list():
 
 
 def test_error_an_enum_list():
-	result = subprocess.run(
-		shlex.split("../venv/bin/python3.9 demo_enum.py an_enum_list --value value1 --value valuenotexist"),
-		stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("an_enum_list --value value1 --value valuenotexist")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
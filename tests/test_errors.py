@@ -1,10 +1,11 @@
 import pytest
-import shlex
-import subprocess
 import logging
 import rich
 from rich.logging import RichHandler
 
+import funcli
+import demo
+
 log = logging.getLogger(name=__name__)
 
 log.setLevel(logging.DEBUG)
@@ -14,11 +15,13 @@ handler = RichHandler(console=console)
 handler.setLevel(logging.DEBUG)
 log.addHandler(handler)
 
+runner = funcli.CliRunner(funcli.Cli(demo.functions, "simple", prog="demo.py", module=demo))
+
 
 def test_error_mandatory():
-	result = subprocess.run(shlex.split("../venv/bin/python3.9 demo.py a_bool"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("a_bool")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -27,11 +30,9 @@ def test_error_mandatory():
 
 
 def test_error_type():
-	result = subprocess.run(
-		shlex.split("../venv/bin/python3.9 demo.py an_int --value a"),
-		stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("an_int --value a")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -40,11 +41,9 @@ def test_error_type():
 
 
 def test_error_missing_value():
-	result = subprocess.run(
-		shlex.split("../venv/bin/python3.9 demo.py an_int --value"),
-		stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("an_int --value")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -53,11 +52,9 @@ def test_error_missing_value():
 
 
 def test_raise_custom_error():
-	result = subprocess.run(
-		shlex.split("../venv/bin/python3.9 demo.py raise_error"),
-		stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("raise_error")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -66,9 +63,9 @@ def test_raise_custom_error():
 	
 
 def test_error_unknown_fun():
-	result = subprocess.run(shlex.split("../venv/bin/python3.9 demo.py unknown_function"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("unknown_function")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -0,0 +1,58 @@
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+import demo_file
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+runner = funcli.CliRunner(funcli.Cli(demo_file.functions, prog="demo_file.py", module=demo_file))
+
+
+@pytest.fixture
+def a_file(tmp_path):
+	path = tmp_path / "data.bin"
+	path.write_bytes(b"hello world")
+	return path
+
+
+def test_a_mapped_file(a_file):
+	result = runner.invoke(f"a_mapped_file --data {a_file}")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
+	log.info(stdout)
+	log.error(stderr)
+	print(f"{stdout=}")
+	print(f"{stderr=}")
+	assert stdout.__contains__("result=b'hello', 11")
+
+
+def test_a_binary_file(a_file):
+	result = runner.invoke(f"a_binary_file --data {a_file}")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
+	log.info(stdout)
+	log.error(stderr)
+	print(f"{stdout=}")
+	print(f"{stderr=}")
+	assert stdout.__contains__("result=b'hello'")
+
+
+def test_error_missing_file(tmp_path):
+	result = runner.invoke(f"a_mapped_file --data {tmp_path}/missing.bin")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
+	log.info(stdout)
+	log.error(stderr)
+	print(f"{stdout=}")
+	print(f"{stderr=}")
+	assert stderr.__contains__(f"demo_file.py a_mapped_file: error: argument --data: no such file: '{tmp_path}/missing.bin'")
@@ -1,10 +1,14 @@
+import json
+import re
 import pytest
-import shlex
-import subprocess
 import logging
 import rich
 from rich.logging import RichHandler
 
+import funcli
+import demo
+import demo_enum
+
 log = logging.getLogger(name=__name__)
 
 log.setLevel(logging.DEBUG)
@@ -14,10 +18,12 @@ handler = RichHandler(console=console)
 handler.setLevel(logging.DEBUG)
 log.addHandler(handler)
 
+runner = funcli.CliRunner(funcli.Cli(demo.functions, "simple", prog="demo.py", module=demo))
+
 def test_show_version():
-	result = subprocess.run(shlex.split("../venv/bin/python3.9 demo.py --version"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("--version")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -26,43 +32,100 @@ def test_show_version():
 
 
 def test_help():
-	result = subprocess.run(shlex.split("../venv/bin/python3.9 demo.py --help"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("--help")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
 	print(f"{stderr=}")
-	assert stdout.__contains__("TODO")
+	assert stdout.__contains__("usage: demo.py [-h] [--full-help] [--version]")
+	assert stdout.__contains__("default_value       function with default values for every args")
+	assert not stdout.__contains__("--help-format")
 
 
 def test_full_help():
-	result = subprocess.run(shlex.split("../venv/bin/python3.9 demo.py --full-help"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("--full-help")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
 	print(f"{stderr=}")
-	assert stdout.__contains__("TODO")
+	assert stdout.__contains__("Help for subcommand 'default_value':")
+	assert stdout.__contains__("Help for subcommand 'an_int':")
+	assert re.search(r"--value VALUE +REQUIRED +single +int", stdout)
 	
 
 def test_simple_help():
-	result = subprocess.run(shlex.split("../venv/bin/python3.9 demo.py simple --help"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("simple --help")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
 	print(f"{stderr=}")
-	assert stdout.__contains__("TODO")
+	assert stdout.__contains__("simple function with no args")
+	assert not stdout.__contains__("args:")
 
 def test_default_value_help():
-	result = subprocess.run(shlex.split("../venv/bin/python3.9 demo.py default_value --help"), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("default_value --help")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
 	print(f"{stderr=}")
-	assert stdout.__contains__("TODO")
\ No newline at end of file
+	assert re.search(r"ARG +REQUIRED +COUNT +TYPE +DEFAULT +DESCRIPTION", stdout)
+	assert re.search(r"--a_bool, --no-a_bool +optional +single +bool +True", stdout)
+	assert re.search(r"--a_str A_STR +optional +single +str +'string'", stdout)
+	assert re.search(r"--a_list A_LIST +optional +multiple +str +'a', 'b', 'c'", stdout)
+
+
+def test_enum_help():
+	enum_runner = funcli.CliRunner(funcli.Cli(demo_enum.functions, prog="demo_enum.py", module=demo_enum))
+	result = enum_runner.invoke("an_enum_list --help")
+	stdout = result.stdout.strip()
+	log.info(stdout)
+	assert re.search(r"--value \{value1,value2\} +REQUIRED +multiple +value1\|value2", stdout)
+
+
+def test_json_help():
+	result = runner.invoke("--help-format json default_value --help")
+	log.info(result.stdout)
+	assert result.exit_code == 0
+	help = json.loads(result.stdout)
+	assert help["prog"] == "demo.py default_value"
+	assert [arg["name"] for arg in help["args"]] == ["a_bool", "a_int", "a_str", "a_list"]
+	assert help["args"][3] == {
+		"name": "a_list",
+		"options": ["--a_list"],
+		"required": False,
+		"multiple": True,
+		"type": "str",
+		"default": ["a", "b", "c"],
+		"default_text": "'a', 'b', 'c'",
+		"choices": None,
+		"description": "",
+	}
+
+
+def test_json_full_help():
+	result = runner.invoke("--help-format json --full-help")
+	assert result.exit_code == 0
+	help = json.loads(result.stdout)
+	assert list(help["subcommands"]) == ["simple", "default_value", "a_bool", "raise_error", "an_int"]
+	assert help["subcommands"]["an_int"]["args"][0]["required"] is True
+	assert json.loads(runner.invoke("--help-format=json --full-help").stdout) == help
+	assert json.loads(runner.invoke("--help-format=json default_value --help").stdout)["prog"] == "demo.py default_value"
+
+
+def test_help_cached(monkeypatch):
+	cli = funcli.Cli(demo.functions, "simple", prog="demo.py", module=demo)
+	subparser = cli.subparsers.choices["default_value"]
+	monkeypatch.setenv("COLUMNS", "100")
+	first = subparser.format_help()
+	assert subparser.format_help() is first
+	monkeypatch.setenv("COLUMNS", "200")  # Another width is rendered again
+	subparser.format_help()
+	assert len(subparser.help_cache) == 2
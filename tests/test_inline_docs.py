@@ -0,0 +1,107 @@
+import re
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+import demo_inline
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+runner = funcli.CliRunner(funcli.Cli(demo_inline.functions, "say_hello", prog="demo_inline.py", module=demo_inline))
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+	monkeypatch.setenv("FUNCLI_CACHE_DIR", str(tmp_path))
+	monkeypatch.setattr(funcli, "inline_docs_cache", {})
+	return tmp_path
+
+
+def test_inline_docs_help(monkeypatch):
+	monkeypatch.setenv("COLUMNS", "200")  # Don't wrap the descriptions
+	result = runner.invoke("say_hello --help")
+	stdout = result.stdout.strip()
+	log.info(stdout)
+	print(f"{stdout=}")
+	assert re.search(r"--name NAME +optional +single +str +'world' +The name of the guy to say hello to\n", stdout)
+	assert stdout.__contains__("Eg: \"john\"")
+	assert re.search(r"--age AGE +optional +single +int +42 +The age of the guy", stdout)
+	assert re.search(r"--lang LANG +optional +single +str +'en' +The language, described in the docstring", stdout)
+
+
+def test_inline_docs_cached_on_disk(cache_dir, monkeypatch):
+	assert funcli.get_inline_docs(demo_inline.say_hello) == {
+		"name": "The name of the guy to say hello to\nEg: \"john\"",
+		"age": "The age of the guy",
+	}
+	assert len(list((cache_dir / "inline_docs").iterdir())) == 1
+	
+	funcli.inline_docs_cache.clear()
+	monkeypatch.setattr(funcli, "extract_inline_docs", None)  # A warm start must not parse the source again
+	assert funcli.get_inline_docs(demo_inline.say_hello)["age"] == "The age of the guy"
+
+
+def test_inline_docs_read_once(monkeypatch):
+	hashed = []
+	sha256 = funcli.hashlib.sha256
+	monkeypatch.setattr(funcli.hashlib, "sha256", lambda data: hashed.append(data) or sha256(data))
+	for function in demo_inline.functions * 10:
+		funcli.get_inline_docs(function)
+	assert len(hashed) == 1
+
+
+def test_inline_docs_every_function_of_a_module():
+	source = (
+		"def fun1(a,  # comment of a\n"
+		"         b):  # not a comment of b\n"
+		"    pass\n"
+		"class Class:\n"
+		"    def method(self, c=1):  # not a comment of c\n"
+		"        def nested(\n"
+		"            d,  # comment of d\n"
+		"        ):\n"
+		"            pass\n"
+	)
+	assert funcli.extract_inline_docs(source) == {
+		"fun1": {"a": "comment of a"},
+		"Class.method.<locals>.nested": {"d": "comment of d"},
+	}
+
+
+def test_ref_help(monkeypatch):
+	monkeypatch.setenv("COLUMNS", "200")  # Don't wrap the descriptions
+	result = runner.invoke("say_hello_twice --help")
+	stdout = result.stdout.strip()
+	log.info(stdout)
+	print(f"{stdout=}")
+	assert stdout.__contains__("function with args described by inline comments\nAnd twice!")
+	assert re.search(r"--name NAME +optional +single +str +'world' +The name of the guy to say hello to\n", stdout)
+	assert stdout.__contains__("Eg: \"john\"\n")
+	assert stdout.__contains__("He will be greeted twice")
+
+
+def test_ref_cycle():
+	def fun1():
+		"""
+		ref=fun2.__doc__
+		fun1 details
+		"""
+	
+	def fun2():
+		"""
+		ref=fun1.__doc__
+		fun2 details
+		"""
+	
+	doc_index = funcli.DocIndex({"fun1": fun1, "fun2": fun2})
+	assert doc_index.get_description(fun1) == "ref=fun1.__doc__\nfun2 details\nfun1 details"
+	assert doc_index.get_description(fun2) == "ref=fun1.__doc__\nfun2 details"
@@ -0,0 +1,139 @@
+import time
+import threading
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+
+def square(value: int):
+	"""
+	function returning a square
+	"""
+	print(f"result={value * value}")
+	return value * value
+
+
+def letters(count: int = 3):
+	"""
+	function returning a list
+	"""
+	return ["a"] * count
+
+
+def slow(seconds: float):
+	"""
+	function sleeping
+	"""
+	time.sleep(seconds)
+
+
+def fail():
+	"""
+	function raising a funcli error
+	"""
+	raise funcli.ArgError("value", "always fails")
+
+
+@pytest.fixture
+def journal(tmp_path):
+	journal = funcli.Journal(str(tmp_path / "journal.sqlite"), max_entries=5, flush_interval=0.01)
+	yield journal
+	journal.close()
+
+
+@pytest.fixture
+def runner(journal):
+	return funcli.CliRunner(funcli.Cli([square, letters, slow, fail], prog="test_journal.py", journal=journal))
+
+
+def test_journal_record(runner, journal):
+	assert runner.invoke("square --value 3").exit_code == 0
+	assert runner.invoke("letters --count 4").exit_code == 0
+	assert runner.invoke("fail").exit_code == 1
+	assert runner.invoke("square --value a").exit_code == 2  # Not dispatched, not recorded
+
+	entries = journal.find()
+	assert [entry.command for entry in entries] == ["fail", "letters", "square"]
+	fail_entry, letters_entry, square_entry = entries
+	assert square_entry.argv == ["square", "--value", "3"]
+	assert square_entry.args == {"value": 3}
+	assert square_entry.exit_status == 0
+	assert square_entry.result_size == 1
+	assert letters_entry.result_size == 4
+	assert fail_entry.exit_status == 1
+	assert fail_entry.result_size == 0
+	assert journal.get(square_entry.id) == square_entry
+
+
+def test_journal_find(runner, journal):
+	runner.invoke("slow --seconds 0.2")
+	runner.invoke("slow --seconds 0")
+	runner.invoke("square --value 1")
+	slowest = journal.find(slowest=True, limit=1)
+	assert slowest[0].argv == ["slow", "--seconds", "0.2"]
+	assert slowest[0].duration >= 0.2
+	assert len(journal.find(command="slow")) == 2
+	assert len(journal.find(min_duration=0.2)) == 1
+	assert journal.find(since=time.time() + 60) == []
+
+
+def test_journal_rotation(runner, journal):
+	for value in range(8):
+		runner.invoke(["square", "--value", str(value)])
+	entries = journal.find()
+	assert len(entries) == 5
+	assert [entry.args["value"] for entry in entries] == [7, 6, 5, 4, 3]
+
+
+def test_journal_replay(runner, journal):
+	runner.invoke("square --value 7")
+	entry_id = journal.find()[0].id
+	result = runner.invoke(f"--replay {entry_id}")
+	assert result.exit_code == 0
+	assert result.stdout.__contains__("result=49")
+	assert result.return_value == 49
+	assert runner.invoke(f"--replay={entry_id}").return_value == 49
+
+	result = runner.invoke("--replay 12345")
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("no call 12345 in the journal")
+
+
+def test_journal_pipeline(runner, journal):
+	runner.invoke("letters :: letters")  # letters can't take a list, the call fails
+	entry = journal.find()[0]
+	assert entry.command == "letters :: letters"
+	assert entry.exit_status == 1
+
+
+def test_journal_unopenable(tmp_path):
+	(tmp_path / "file").write_text("")
+	journal = funcli.Journal(str(tmp_path / "file" / "journal.sqlite"), flush_interval=0.01)  # Under a regular file
+	runner = funcli.CliRunner(funcli.Cli([square], prog="test_journal.py", journal=journal))
+	result = runner.invoke("square --value 3")
+	assert result.exit_code == 0
+	assert result.return_value == 9
+
+	flusher = threading.Thread(target=journal.flush, daemon=True)
+	flusher.start()
+	flusher.join(timeout=5)
+	assert not flusher.is_alive()
+	with pytest.raises(OSError):
+		journal.find()
+
+	result = runner.invoke("--replay 1")
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("can't read the journal")
+	journal.close()
@@ -0,0 +1,119 @@
+import enum
+import json
+import os
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+evaluations = []
+
+
+class Level(enum.Enum):
+	low = 1
+	high = 2
+
+
+def expensive_jobs():
+	evaluations.append("jobs")
+	return 8
+
+
+def build(
+	jobs: int = funcli.Lazy(expensive_jobs),
+	level: Level = funcli.Lazy.env("TEST_LAZY_LEVEL", "low"),
+	retries: int = funcli.Lazy.env("TEST_LAZY_RETRIES", "3"),
+	verbose: bool = funcli.Lazy.env("TEST_LAZY_VERBOSE", "false"),
+	snapshot = funcli.Lazy(lambda: "latest", placeholder="<latest snapshot>"),
+):
+	"""
+	function with lazy defaults
+	"""
+	print(f"result={jobs}, {level}, {retries}, {verbose}, {snapshot}")
+	return jobs, level, retries, verbose, snapshot
+
+
+def other():
+	"""
+	function with no args
+	"""
+	print("result=ok")
+
+
+cli = funcli.Cli([build, other], prog="test_lazy.py")
+runner = funcli.CliRunner(cli)
+
+
+@pytest.fixture(autouse=True)
+def clear_evaluations(monkeypatch):
+	evaluations.clear()
+	for name in ["TEST_LAZY_LEVEL", "TEST_LAZY_RETRIES", "TEST_LAZY_VERBOSE"]:
+		monkeypatch.delenv(name, raising=False)
+
+
+def test_lazy_evaluated_when_called():
+	result = runner.invoke("build")
+	log.info(result.stdout)
+	assert result.exit_code == 0
+	assert result.return_value == (8, Level.low, 3, False, "latest")
+	assert evaluations == ["jobs"]
+
+
+def test_lazy_not_evaluated():
+	assert runner.invoke("other").exit_code == 0
+	assert runner.invoke("build --help").exit_code == 0
+	assert runner.invoke("build --jobs 2").return_value[0] == 2
+	assert evaluations == []
+
+
+def test_lazy_env(monkeypatch):
+	monkeypatch.setenv("TEST_LAZY_LEVEL", "high")
+	monkeypatch.setenv("TEST_LAZY_RETRIES", "5")
+	monkeypatch.setenv("TEST_LAZY_VERBOSE", "yes")
+	assert runner.invoke("build").return_value[1:4] == (Level.high, 5, True)
+
+	monkeypatch.setenv("TEST_LAZY_RETRIES", "five")
+	result = runner.invoke("build")
+	assert result.exit_code == 1
+	assert result.stdout.__contains__("ERROR: retries: invalid default $TEST_LAZY_RETRIES='five'")
+
+
+def test_lazy_help(monkeypatch):
+	monkeypatch.setenv("COLUMNS", "200")
+	stdout = runner.invoke("build --help").stdout
+	log.info(stdout)
+	assert stdout.__contains__("test_lazy.expensive_jobs()")
+	assert stdout.__contains__("$TEST_LAZY_LEVEL")
+	assert stdout.__contains__("<latest snapshot>")
+
+
+def test_lazy_schema(tmp_path):
+	path = tmp_path / "schema.json"
+	cli.export_schema(str(path))
+	assert json.loads(path.read_text())["functions"]["build"]["args"]["jobs"]["default"] is None
+	schema_runner = funcli.CliRunner(funcli.load_schema(str(path)))
+	assert schema_runner.invoke("build").return_value == (8, Level.low, 3, False, "latest")
+
+
+def test_lazy_json_help():
+	args = json.loads(runner.invoke("--help-format json build --help").stdout)["args"]
+	assert args[0]["default"] is None
+	assert args[0]["default_text"] == "test_lazy.expensive_jobs()"
+	assert args[2]["default_text"] == "$TEST_LAZY_RETRIES"
+
+
+def test_lazy_default_placeholder():
+	assert repr(funcli.Lazy(os.cpu_count)) == "os.cpu_count()"
+	assert repr(funcli.Lazy(len)) == "len()"
+	assert repr(funcli.Lazy(expensive_jobs)) == "test_lazy.expensive_jobs()"
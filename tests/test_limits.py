@@ -0,0 +1,108 @@
+import asyncio
+import time
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+
+def sleep(seconds: float = 10):
+	"""
+	function sleeping
+	:param seconds:
+	"""
+	time.sleep(seconds)
+	print("result=awake")
+
+
+async def async_sleep(seconds: float = 10):
+	"""
+	async function sleeping
+	:param seconds:
+	"""
+	await asyncio.sleep(seconds)
+	print("result=awake")
+
+
+def burn_cpu(seconds: float = 10):
+	"""
+	function using the CPU
+	:param seconds:
+	"""
+	start = time.process_time()
+	while time.process_time() - start < seconds:
+		pass
+	print("result=burnt")
+
+
+def stubborn_sleep(seconds: float = 10):
+	"""
+	function ignoring the limits
+	:param seconds:
+	"""
+	try:
+		time.sleep(seconds)
+	except funcli.LimitError:
+		time.sleep(seconds)
+	print("result=awake")
+
+
+cli = funcli.Cli([sleep, async_sleep, burn_cpu], prog="test_limits.py", limit_options=True)
+runner = funcli.CliRunner(cli)
+
+
+def test_timeout():
+	result = runner.invoke("--timeout 0.2 sleep")
+	log.info(result.stdout)
+	assert result.exit_code == 1
+	assert result.stdout.__contains__("ERROR: timeout: call exceeded 0.2s")
+
+
+def test_async_timeout():
+	result = runner.invoke("--timeout 0.2 async_sleep")
+	log.info(result.stdout)
+	assert result.exit_code == 1
+	assert result.stdout.__contains__("ERROR: timeout: call cancelled after 0.2s")
+
+
+def test_cpu_seconds():
+	result = runner.invoke("--cpu-seconds 1 burn_cpu")
+	log.info(result.stdout)
+	assert result.exit_code == 1
+	assert result.stdout.__contains__("ERROR: cpu-seconds: call used more than 1.0 CPU seconds")
+
+
+def test_within_limits():
+	result = runner.invoke("--timeout 5 --cpu-seconds 5 sleep --seconds 0.01")
+	log.info(result.stdout)
+	assert result.exit_code == 0
+	assert result.stdout.__contains__("result=awake")
+
+
+def test_limit_options_with_equals():
+	result = runner.invoke("--timeout=5 --cpu-seconds=5 sleep --seconds 0.01")
+	log.info(result.stderr)
+	assert result.exit_code == 0
+	assert result.stdout.__contains__("result=awake")
+	result = runner.invoke("--timeout=0.2 sleep")
+	assert result.stdout.__contains__("ERROR: timeout: call exceeded 0.2s")
+
+
+def test_pool_kills_worker_after_timeout():
+	limits = funcli.Limits(timeout=0.2)
+	with funcli.WorkerPool(funcli.Cli([stubborn_sleep], prog="test_limits.py"), processes=1, limits=limits, kill_grace=0.2) as pool:
+		results = pool.map(["stubborn_sleep", "stubborn_sleep --seconds 0.01"])
+	assert results[0].exit_code == 1
+	assert results[0].stderr.__contains__("ERROR: timeout: call exceeded 0.2s, worker killed")
+	assert results[1].stdout.__contains__("result=awake")
@@ -1,10 +1,11 @@
 import pytest
-import shlex
-import subprocess
 import logging
 import rich
 from rich.logging import RichHandler
 
+import funcli
+import demo_list
+
 log = logging.getLogger(name=__name__)
 
 log.setLevel(logging.DEBUG)
@@ -14,16 +15,16 @@ handler = RichHandler(console=console)
 handler.setLevel(logging.DEBUG)
 log.addHandler(handler)
 
+runner = funcli.CliRunner(funcli.Cli(demo_list.functions, prog="demo_list.py", module=demo_list))
+
 
 def test_an_unspecified_list_to_list_str():
 	"""
 	If list is used instead of list[...], it's considered to be list[str]
 	"""
-	result = subprocess.run(
-		shlex.split("../venv/bin/python3.9 demo_list.py an_unspecified_list --a_list 11 --a_list 22 --a_list 33"),
-		stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("an_unspecified_list --a_list 11 --a_list 22 --a_list 33")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -32,11 +33,9 @@ def test_an_unspecified_list_to_list_str():
 
 
 def test_an_str_list():
-	result = subprocess.run(
-		shlex.split("../venv/bin/python3.9 demo_list.py an_str_list --a_list test1 --a_list test2 --a_list test3"),
-		stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("an_str_list --a_list test1 --a_list test2 --a_list test3")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -45,11 +44,9 @@ def test_an_str_list():
 
 
 def test_an_int_list():
-	result = subprocess.run(
-		shlex.split("../venv/bin/python3.9 demo_list.py an_int_list --a_list 11 --a_list 22 --a_list 33"),
-		stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-	stdout = result.stdout.decode("utf-8").strip()
-	stderr = result.stderr.decode("utf-8").strip()
+	result = runner.invoke("an_int_list --a_list 11 --a_list 22 --a_list 33")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
 	log.info(stdout)
 	log.error(stderr)
 	print(f"{stdout=}")
@@ -0,0 +1,125 @@
+import json
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+produced = []
+
+
+def numbers(count: int):
+	"""
+	function yielding ints, lazily
+	"""
+	for number in range(count):
+		produced.append(number)
+		yield number
+
+
+def scale(items, factor: int = 1):
+	"""
+	function scaling every item, lazily
+	"""
+	for item in items:
+		yield item * factor
+
+
+def first(items, count: int = 1):
+	"""
+	function taking the first items
+	"""
+	return [item for _, item in zip(range(count), items)]
+
+
+@funcli.piped("items")
+def total(label: str, items):
+	"""
+	function summing the items, with a designated piped arg
+	"""
+	result = sum(items)
+	print(f"result={label}:{result}")
+	return result
+
+
+def simple():
+	"""
+	function with no args
+	"""
+	print("result=ok")
+
+
+cli = funcli.Cli([numbers, scale, first, total, simple], prog="test_pipeline.py")
+runner = funcli.CliRunner(cli)
+
+
+def test_pipeline():
+	result = runner.invoke("numbers --count 4 :: scale --factor 10 :: total --label sum")
+	log.info(result.stdout)
+	log.error(result.stderr)
+	assert result.exit_code == 0
+	assert result.stdout.__contains__("result=sum:60")
+	assert result.return_value == 60
+
+
+def test_pipeline_lazy():
+	produced.clear()
+	result = runner.invoke(["numbers", "--count", "1000000", "::", "scale", "::", "first", "--count", "3"])
+	assert result.exit_code == 0
+	assert result.return_value == [0, 1, 2]
+	assert len(produced) <= 4  # Items are pulled through the pipeline, not copied
+
+
+def test_pipeline_streams_last_generator():
+	result = runner.invoke("numbers --count 3 :: scale --factor 2")
+	assert result.exit_code == 0
+	assert result.stdout.splitlines() == ["0", "2", "4"]
+	assert result.return_value == 3
+
+
+def test_pipeline_errors():
+	result = runner.invoke("numbers --count 3 :: total")
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("the following arguments are required: --label")
+
+	result = runner.invoke("numbers --count 3 :: scale --items 1")
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("receives the result of the previous function")
+
+	result = runner.invoke("numbers --count 3 :: unknown")
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("a subcommand is expected")
+
+	result = runner.invoke("numbers --count 3 :: simple")
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("no arg to receive the result")
+
+
+def test_pipeline_standalone_still_requires_piped_arg():
+	result = runner.invoke("total --label sum")
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("--items")
+
+
+def test_piped_unknown_arg():
+	with pytest.raises(ValueError):
+		funcli.piped("nope")(simple)
+
+
+def test_pipeline_schema(tmp_path):
+	path = tmp_path / "schema.json"
+	cli.export_schema(str(path))
+	schema = json.loads(path.read_text())
+	assert schema["functions"]["total"]["piped"] == "items"
+	assert schema["functions"]["scale"]["piped"] == "items"
+	assert schema["functions"]["simple"]["piped"] is None
@@ -0,0 +1,66 @@
+import os
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+import demo
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+cli = funcli.Cli(demo.functions, "simple", prog="demo.py", module=demo)
+
+
+def get_pid():
+	"""
+	function returning the pid of the process running it
+	"""
+	return os.getpid()
+
+
+def crash():
+	"""
+	function killing the process running it
+	"""
+	os._exit(3)
+
+
+@pytest.fixture(scope="module")
+def pool():
+	with funcli.WorkerPool(funcli.Cli([get_pid, crash], prog="test_pool.py"), processes=2) as pool:
+		yield pool
+
+
+def test_pool_map():
+	with funcli.WorkerPool(cli, processes=2) as pool:
+		results = pool.map(["simple", "an_int --value 3", "an_int --value a", "raise_error"])
+	for result in results:
+		log.info(result.stdout)
+		log.error(result.stderr)
+	assert results[0].stdout.__contains__("result=ok")
+	assert results[1].stdout.__contains__("result=3")
+	assert results[2].exit_code == 2
+	assert results[2].stderr.__contains__("demo.py an_int: error: argument --value: invalid int value: 'a'")
+	assert results[3].exit_code == 1
+	assert results[3].stdout.__contains__("ERROR: test: This arg value doesn't look right")
+
+
+def test_pool_runs_in_workers(pool):
+	results = pool.map(["get_pid"] * 10)
+	pids = {result.return_value for result in results}
+	assert os.getpid() not in pids
+	assert 1 <= len(pids) <= 2
+
+
+def test_pool_replaces_dead_worker(pool):
+	result = pool.invoke("crash")
+	assert result.exit_code == 3
+	assert pool.invoke("get_pid").exit_code == 0
@@ -0,0 +1,129 @@
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+
+def greet(name: str):
+	"""
+	function greeting someone
+	"""
+	print(f"result=hello {name}")
+
+
+def wrapper(name: str):
+	"""
+	ref=greet.__doc__
+	:param name: ref=greet.name
+	"""
+	greet(name)
+
+
+def other(count: int = 1):
+	"""
+	function not related to greet
+	"""
+	return count
+
+
+def make_greet(greeting: str):
+	def greet(name: str, punctuation: str = "!"):
+		print(f"result={greeting} {name}{punctuation}")
+	greet.__doc__ = f"function saying {greeting}"
+	return greet
+
+
+@pytest.fixture
+def cli():
+	return funcli.Cli([greet, wrapper, other], prog="test_registry.py")
+
+
+def test_register(cli, monkeypatch):
+	monkeypatch.setenv("COLUMNS", "200")
+	runner = funcli.CliRunner(cli)
+	assert runner.invoke("--help").stdout.__contains__("{greet,wrapper,other}")
+
+	@funcli.cacheable()
+	def added(value: int):
+		"""
+		function registered later
+		"""
+		return value * 2
+
+	cli.register(added)
+	result = runner.invoke("added --value 2")
+	assert result.exit_code == 0
+	assert result.return_value == 4
+	stdout = runner.invoke("--help").stdout
+	assert stdout.__contains__("{greet,wrapper,other,added}")
+	assert stdout.__contains__("function registered later")
+	assert stdout.__contains__("--no-cache")
+
+
+def test_register_replace(cli, monkeypatch):
+	monkeypatch.setenv("COLUMNS", "200")
+	runner = funcli.CliRunner(cli)
+	assert runner.invoke("wrapper --help").stdout.__contains__("function greeting someone")
+	other_parser = cli.subparsers.choices["other"]
+	other_help = runner.invoke("other --help").stdout
+
+	cli.register(make_greet("bonjour"), name="greet")
+	result = runner.invoke("greet --name Ada --punctuation ?")
+	assert result.exit_code == 0
+	assert result.stdout.__contains__("result=bonjour Ada?")
+	assert cli.definitions["greet"].fun.__doc__ == "function saying bonjour"
+	assert runner.invoke("--help").stdout.__contains__("{wrapper,other,greet}")
+
+	# The descriptions referencing the replaced function are resolved again
+	stdout = runner.invoke("wrapper --help").stdout
+	assert stdout.__contains__("function saying bonjour")
+	assert cli.definitions["wrapper"].descr == "function saying bonjour"
+
+	# The other functions are not built again
+	assert cli.subparsers.choices["other"] is other_parser
+	assert other_parser.help_cache
+	assert runner.invoke("other --help").stdout == other_help
+
+
+def test_unregister(cli):
+	runner = funcli.CliRunner(cli)
+	cli.unregister("other")
+	result = runner.invoke("other")
+	assert result.exit_code == 2
+	assert "other" not in cli.definitions
+	assert not runner.invoke("--help").stdout.__contains__("other")
+	with pytest.raises(KeyError):
+		cli.unregister("other")
+
+
+def test_register_many():
+	functions = [make_greet(f"hello{index}") for index in range(300)]
+	cli = funcli.Cli([], prog="test_registry.py")
+	for index, function in enumerate(functions):
+		cli.register(function, name=f"greet{index}")
+	parsers = dict(cli.subparsers.choices)
+	cli.register(make_greet("hi"), name="greet150")
+	assert all(cli.subparsers.choices[name] is parser for name, parser in parsers.items() if name != "greet150")
+	result = funcli.CliRunner(cli).invoke("greet150 --name Ada")
+	assert result.stdout.__contains__("result=hi Ada!")
+
+
+def test_schema_cli_register(tmp_path, cli):
+	path = tmp_path / "schema.json"
+	cli.export_schema(str(path))
+	schema_cli = funcli.load_schema(str(path))
+	with pytest.raises(TypeError):
+		schema_cli.register(other)
+	with pytest.raises(TypeError):
+		schema_cli.unregister("other")
@@ -0,0 +1,140 @@
+import json
+import importlib.util
+import os
+import subprocess
+import sys
+import uuid
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+import demo_enum
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+
+@pytest.fixture
+def schema_cli(tmp_path):
+	path = tmp_path / "demo_enum.json"
+	funcli.Cli(demo_enum.functions, prog="demo_enum.py", module=demo_enum).export_schema(str(path))
+	return funcli.load_schema(str(path))
+
+
+def test_schema_help_without_import(schema_cli):
+	result = funcli.CliRunner(schema_cli).invoke("an_enum --help")
+	log.info(result.stdout)
+	assert result.exit_code == 0
+	assert result.stdout.__contains__("usage: demo_enum.py an_enum [-h] --value {value1,value2}")
+	assert schema_cli.function_clis == {}
+
+
+def test_schema_error_without_import(schema_cli):
+	result = funcli.CliRunner(schema_cli).invoke("an_enum --value valuenotexist")
+	log.error(result.stderr)
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("usage: demo_enum.py an_enum [-h] --value {value1,value2}\ndemo_enum.py an_enum: error: argument --value: invalid choice: 'valuenotexist' (choose from 'value1', 'value2')")
+	assert schema_cli.function_clis == {}
+
+
+def test_schema_call(schema_cli):
+	result = funcli.CliRunner(schema_cli).invoke("an_enum_list --value value1 --value value2")
+	log.info(result.stdout)
+	assert result.stdout.__contains__("result=[<Value.value1: 1>, <Value.value2: 2>]")
+	assert list(schema_cli.function_clis) == ["an_enum_list"]
+
+
+def price(amount: uuid.UUID):
+	"""
+	function with an arg type unknown to the schema
+	"""
+	return amount
+
+
+def test_schema_invalid_unknown_type(tmp_path):
+	path = tmp_path / "price.json"
+	funcli.Cli([price], prog="price.py").export_schema(str(path))
+	runner = funcli.CliRunner(funcli.load_schema(str(path)))
+	result = runner.invoke("price --amount abc")
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("price.py price: error: argument --amount: invalid UUID value: 'abc'")
+	assert funcli.CliRunner(funcli.Cli([price], prog="price.py")).invoke("price --amount abc").exit_code == 2
+
+	amount = uuid.uuid4()
+	assert runner.invoke(["price", "--amount", str(amount)]).return_value == amount
+
+
+UNGUARDED_SCRIPT = """
+import funcli
+
+def hello(name: str):
+	print(f"hello {name}")
+
+funcli.fun_to_cli([hello])  # No __name__ guard
+"""
+
+
+def test_schema_unguarded_script(tmp_path):
+	script_path = tmp_path / "hello.py"
+	script_path.write_text(UNGUARDED_SCRIPT)
+	schema = funcli.Cli(demo_enum.functions, prog="hello.py", module=demo_enum).to_schema()
+	function_schema = dict(schema["functions"]["an_enum"], module="__main__", file=str(script_path), qualname="hello")
+	function_schema["args"] = {"name": dict(function_schema["args"]["value"], type="str", choices=None)}
+	schema["functions"] = {"hello": function_schema}
+	schema_path = tmp_path / "hello.json"
+	schema_path.write_text(json.dumps(schema))
+
+	result = subprocess.run(
+		[sys.executable, "-c", "import sys, funcli; funcli.load_schema(sys.argv[1]).run(sys.argv[2:])",
+			str(schema_path), "hello", "--name", "bob"],
+		capture_output=True,
+		text=True,
+		env=dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+	)
+	log.info(result.stdout)
+	assert result.returncode == 0, result.stderr
+	assert result.stdout.count("hello bob") == 1  # The script is imported, its own fun_to_cli doesn't run
+
+
+RECORDS_SCRIPT = """
+import funcli
+
+class Rec:
+	pass
+
+def make():
+	return Rec()
+
+def check(rec: Rec):
+	return isinstance(rec, Rec)
+
+funcli.fun_to_cli([make, check])
+"""
+
+
+def test_schema_script_run_once(tmp_path):
+	script_path = tmp_path / "records.py"
+	script_path.write_text(RECORDS_SCRIPT)
+	spec = importlib.util.spec_from_file_location("records", script_path)
+	records = importlib.util.module_from_spec(spec)
+	with funcli.set_context(funcli.importing_script, True):
+		spec.loader.exec_module(records)
+	schema = funcli.Cli([records.make, records.check], prog="records.py", module=records).to_schema()
+	for function_schema in schema["functions"].values():
+		function_schema.update(module="__main__", file=str(script_path))
+	schema_path = tmp_path / "records.json"
+	schema_path.write_text(json.dumps(schema))
+
+	schema_cli = funcli.load_schema(str(schema_path))
+	result = funcli.CliRunner(schema_cli).invoke("make :: check")
+	assert result.exit_code == 0, result.stderr
+	assert result.return_value is True  # Both functions see the same Rec class
+	assert len(schema_cli.script_modules) == 1
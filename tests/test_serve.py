@@ -0,0 +1,174 @@
+import enum
+import json
+import http.client
+import threading
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+
+class Color(enum.Enum):
+	red = 1
+	green = 2
+
+
+def add(a: int, b: int = 2):
+	"""
+	function adding two ints
+	"""
+	return a + b
+
+
+def describe(color: Color, tags: list[str] = [], loud: bool = False):
+	"""
+	function with an enum, a list and a bool
+	"""
+	return {"color": color, "tags": tags, "loud": loud}
+
+
+def count(limit: int):
+	"""
+	function yielding ints
+	"""
+	yield from range(limit)
+
+
+def check(value: int):
+	"""
+	function raising an ArgError
+	"""
+	raise funcli.ArgError("value", "is always wrong")
+
+
+cli = funcli.Cli([add, describe, count, check], prog="test_serve.py", serve_option=True)
+
+
+@pytest.fixture(scope="module")
+def connection():
+	server = cli.make_server(("127.0.0.1", 0))
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	connection = http.client.HTTPConnection(*server.server_address)  # Kept alive between requests
+	yield connection
+	connection.close()
+	server.shutdown()
+	server.server_close()
+
+
+def post(connection, path, body):
+	connection.request("POST", path, body=json.dumps(body), headers={"Content-Type": "application/json"})
+	response = connection.getresponse()
+	data = response.read()
+	log.info(f"{path} {body} -> {response.status} {data}")
+	return response.status, json.loads(data) if data else None
+
+
+def test_serve_call(connection):
+	assert post(connection, "/add", {"a": 1}) == (200, {"result": 3})
+	assert post(connection, "/add", {"a": 1, "b": -5}) == (200, {"result": -4})
+	assert post(connection, "/describe", {"color": "green", "tags": ["x", "y"], "loud": True}) == (
+		200, {"result": {"color": "green", "tags": ["x", "y"], "loud": True}}
+	)
+	assert post(connection, "/count", {"limit": 3}) == (200, {"result": [0, 1, 2]})
+
+
+def test_serve_errors(connection):
+	status, response = post(connection, "/add", {"a": "one"})
+	assert status == 400
+	assert response["error"]["code"] == funcli.JSONRPC_INVALID_PARAMS
+	assert response["error"]["message"].__contains__("invalid int value")
+
+	status, response = post(connection, "/add", {})
+	assert status == 400
+	assert response["error"]["message"].__contains__("required")
+
+	status, response = post(connection, "/add", {"a": 1, "c": 1})
+	assert status == 400
+
+	status, response = post(connection, "/describe", {"color": "blue"})
+	assert status == 400
+	assert response["error"]["message"].__contains__("invalid choice")
+
+	status, response = post(connection, "/check", {"value": 1})
+	assert status == 400
+	assert response["error"]["message"] == "value: is always wrong"
+
+	status, response = post(connection, "/unknown", {})
+	assert status == 404
+	assert response["error"]["code"] == funcli.JSONRPC_METHOD_NOT_FOUND
+
+
+def test_serve_param_types(connection):
+	for path, params in [
+		("/describe", {"color": "green", "loud": "false"}),
+		("/describe", {"color": "green", "loud": 0}),
+		("/add", {"a": [1, 2]}),
+		("/add", {"a": {"value": 1}}),
+		("/describe", {"color": "green", "tags": ["x", ["y"]]}),
+		("/describe", {"color": "green", "tags": {"x": 1}}),
+	]:
+		status, response = post(connection, path, params)
+		assert status == 400, params
+		assert response["error"]["code"] == funcli.JSONRPC_INVALID_PARAMS, params
+	status, response = post(connection, "/describe", {"color": "green", "loud": "false"})
+	assert response["error"]["message"] == 'argument loud: expected a boolean, got "false"'
+	assert post(connection, "/describe", {"color": "green", "tags": "x"}) == (
+		200, {"result": {"color": "green", "tags": ["x"], "loud": False}}
+	)
+
+
+def test_serve_jsonrpc(connection):
+	assert post(connection, "/", {"jsonrpc": "2.0", "method": "add", "params": {"a": 2}, "id": 1}) == (
+		200, {"jsonrpc": "2.0", "result": 4, "id": 1}
+	)
+	assert post(connection, "/", {"jsonrpc": "2.0", "method": "add", "params": [2, 3], "id": 2}) == (
+		200, {"jsonrpc": "2.0", "result": 5, "id": 2}
+	)
+	assert post(connection, "/", {"jsonrpc": "2.0", "method": "add", "params": {"a": 2}}) == (204, None)
+
+	status, responses = post(connection, "/", [
+		{"jsonrpc": "2.0", "method": "add", "params": {"a": 1}, "id": 1},
+		{"jsonrpc": "2.0", "method": "unknown", "id": 2},
+		{"jsonrpc": "2.0", "method": "add", "params": [1, 2, 3], "id": 3},
+		{"method": "add", "id": 4},
+	])
+	assert status == 200
+	assert responses[0] == {"jsonrpc": "2.0", "result": 3, "id": 1}
+	assert responses[1]["error"]["code"] == funcli.JSONRPC_METHOD_NOT_FOUND
+	assert responses[2]["error"]["code"] == funcli.JSONRPC_INVALID_PARAMS
+	assert responses[3]["error"]["code"] == funcli.JSONRPC_INVALID_REQUEST
+
+
+def test_serve_schema(connection):
+	connection.request("GET", "/")
+	response = connection.getresponse()
+	schema = json.loads(response.read())
+	assert response.status == 200
+	assert list(schema["functions"]) == ["add", "describe", "count", "check"]
+
+
+def test_serve_argv_still_parsed():
+	# Parse errors are only raised for served calls, argv errors still exit
+	runner = funcli.CliRunner(cli)
+	result = runner.invoke("add --a one")
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("invalid int value")
+	result = runner.invoke("--serve nowhere add")
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("invalid address")
+	result = runner.invoke("--serve=nowhere add")
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("invalid address")
+	assert cli.parse(["--serve=:0"])["serve"] == ("127.0.0.1", 0)
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import pytest
+import shlex
+import subprocess
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+import demo_stream
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+runner = funcli.CliRunner(funcli.Cli(demo_stream.functions, "rows", prog="demo_stream.py", module=demo_stream))
+
+
+def test_stream_generator():
+	result = runner.invoke("rows --count 3")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
+	log.info(stdout)
+	log.error(stderr)
+	print(f"{stdout=}")
+	print(f"{stderr=}")
+	assert stdout == "row=0\nrow=1\nrow=2"
+	assert result.return_value == 3
+
+
+def test_stream_async_generator():
+	result = runner.invoke("async_rows --count 3")
+	stdout = result.stdout.strip()
+	stderr = result.stderr.strip()
+	log.info(stdout)
+	log.error(stderr)
+	print(f"{stdout=}")
+	print(f"{stderr=}")
+	assert stdout == "row=0\nrow=1\nrow=2"
+	assert result.return_value == 3
+
+
+def test_stream_slow_generator():
+	"""
+	The items produced before the generator stalls are written without waiting for the next one
+	"""
+	class Output:
+		def __init__(self):
+			self.writes = []
+
+		def write(self, text):
+			if text:
+				self.writes.append((time.monotonic() - start, text))
+
+		def flush(self):
+			pass
+
+	def slow_rows():
+		yield "row=0"
+		time.sleep(1)
+		yield "row=1"
+
+	output = Output()
+	start = time.monotonic()
+	assert funcli.stream_result(slow_rows(), flush_interval=0.1, file=output) == 2
+	log.info(output.writes)
+	assert [text for _, text in output.writes] == ["row=0\n", "row=1\n"]
+	assert output.writes[0][0] < 0.5
+
+
+def test_stream_broken_pipe():
+	"""
+	The reader closes the pipe before the end, like `| head -n 2`
+	"""
+	tests_dir = os.path.dirname(os.path.abspath(__file__))
+	process = subprocess.Popen(
+		[sys.executable, os.path.join(tests_dir, "demo_stream.py"), *shlex.split("rows --count 100000000")],
+		stdout=subprocess.PIPE,
+		stderr=subprocess.PIPE,
+		env=dict(os.environ, PYTHONPATH=os.path.dirname(tests_dir)),
+	)
+	first_lines = [process.stdout.readline().decode("utf-8").strip() for _ in range(2)]
+	process.stdout.close()
+	process.wait(timeout=60)
+	stderr = process.stderr.read().decode("utf-8").strip()
+	log.error(stderr)
+	print(f"{stderr=}")
+	assert first_lines == ["row=0", "row=1"]
+	assert process.returncode == 0
+	assert not stderr.__contains__("BrokenPipeError")
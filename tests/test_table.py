@@ -0,0 +1,113 @@
+import enum
+import pytest
+import logging
+import rich
+from rich.logging import RichHandler
+
+import funcli
+
+log = logging.getLogger(name=__name__)
+
+log.setLevel(logging.DEBUG)
+console = rich.get_console()
+console.width = 150
+handler = RichHandler(console=console)
+handler.setLevel(logging.DEBUG)
+log.addHandler(handler)
+
+calls = []
+
+
+class Size(enum.Enum):
+	small = 1
+	large = 2
+
+
+def order(item: str, quantity: int, size: Size = Size.small, gift: bool = False, currency: str = "EUR"):
+	"""
+	function called for each row
+	"""
+	calls.append(item)
+	return f"{quantity} {size.name} {item}{' (gift)' if gift else ''} in {currency}"
+
+
+@funcli.vectorized
+def total(price: float, quantity: int = funcli.Lazy(lambda: 1)):
+	"""
+	function called once with the columns
+	"""
+	calls.append(len(price))
+	return sum(p * q for p, q in zip(price, quantity))
+
+
+cli = funcli.Cli([order, total], prog="test_table.py", table_option=True)
+runner = funcli.CliRunner(cli)
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+	calls.clear()
+
+
+@pytest.fixture
+def orders(tmp_path):
+	path = tmp_path / "orders.csv"
+	path.write_text(
+		"item,quantity,size,gift\n"
+		"apple,2,large,yes\n"
+		"pear,1,,false\n"
+	)
+	return path
+
+
+def test_table_rows(orders):
+	result = runner.invoke(["order", "--from-table", str(orders), "--currency", "USD"])
+	log.info(result)
+	assert result.exit_code == 0
+	assert result.return_value == ["2 large apple (gift) in USD", "1 small pear in USD"]
+	assert calls == ["apple", "pear"]
+
+
+def test_table_vectorized(tmp_path):
+	path = tmp_path / "prices.csv"
+	path.write_text("price,quantity\n1.5,2\n2,\n")
+	result = runner.invoke(f"total --from-table={path}")
+	assert result.exit_code == 0
+	assert result.return_value == 5.0
+	assert calls == [2]
+
+
+def test_table_errors(orders, tmp_path):
+	result = runner.invoke(["order", "--from-table", str(orders), "--item", "kiwi"])
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("argument --item: given by the table")
+
+	path = tmp_path / "bad.csv"
+	path.write_text("item,quantity,color\napple,1,red\n")
+	result = runner.invoke(["order", "--from-table", str(path)])
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("unknown columns: color")
+
+	path.write_text("item,quantity\napple,1\npear,many\n")
+	result = runner.invoke(["order", "--from-table", str(path)])
+	assert result.exit_code == 1
+	assert result.stdout.__contains__("ERROR: quantity: row 2: invalid value 'many'")
+	assert calls == []  # Every row is converted before the first call
+
+	path.write_text("item\napple\n")
+	result = runner.invoke(["order", "--from-table", str(path)])
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("the following arguments are required: --quantity")
+
+	result = runner.invoke(["order", "--from-table", str(tmp_path / "missing.csv")])
+	assert result.exit_code == 2
+	assert result.stderr.__contains__("No such file")
+
+
+def test_table_parquet(tmp_path):
+	pyarrow = pytest.importorskip("pyarrow")
+	import pyarrow.parquet
+	path = tmp_path / "orders.parquet"
+	pyarrow.parquet.write_table(pyarrow.table({"item": ["apple"], "quantity": [3], "size": ["large"]}), str(path))
+	result = runner.invoke(["order", "--from-table", str(path)])
+	assert result.return_value == ["3 large apple in EUR"]